@@ -27,4 +27,10 @@ pcops
 catalog
 noteops
 tonerow
+midi
+corpus
+pitchset
+chroma
+rowsearch
+segments
 """.split()
@@ -77,42 +77,362 @@ __metaclass__ = type
 
 __all__ = ('SetCatalog',)
 
+import os
 import pickle
+import sys
+import tempfile
+from array import array
+from hashlib import sha256
 
-from .pcset import PcSet
-from .pcops import exact_equality
+try:
+    import fcntl
+except ImportError:
+    # no advisory locks on this platform
+    fcntl = None
+
+from .pcset import PcSet, PcSetException
+from .pcset import binaryvalue, binarylist, transposevalue, invertvalue
 
 PICKLE_FILE = 'catalog.pkl'
 
+# Pages of catalogs for other equal temperaments, one file per page:
+# PAGE_FILE % (modulus, cardinality)
+PAGE_FILE = 'catalog-%d-%d.dat'
+
+# Number of binary values read or written at a time when streaming pages.
+CHUNK = 4096
+
+# Precomputed tables shipped with the package (see write_tables). The
+# version changes whenever their layout does.
+TABLES_VERSION = 1
+TABLE_NAME = 'tables-%d.dat' % TABLES_VERSION
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          TABLE_NAME)
+
+# Every stored file starts with this, followed by the SHA-256 of the rest of
+# the file in hex and a newline.
+MAGIC = b'pcsets-catalog-1 '
+HEADER_SIZE = len(MAGIC) + 64 + 1
+
+
+class CorruptFileError(IOError):
+    """
+    A stored catalog file is incomplete or fails its checksum. This is an
+    IOError so that it is handled just like a missing file: the catalog is
+    rebuilt and, if possible, stored again.
+    """
+
+
+class ModulusError(PcSetException):
+    """
+    Set classes, complexes and interval vectors are only tabulated for
+    12-tone catalogs; this catalog has modulus %(modulus)d.
+    """
+    def __init__(self, modulus):
+        self.message = self.__doc__ % {'modulus': modulus}
+
+
+def header_for(digest):
+    return MAGIC + digest.encode('ascii') + b'\n'
+
+
+def packed(values):
+    try:
+        return values.tobytes()
+    except AttributeError:
+        # Python 2
+        return values.tostring()
+
+
+def little_endian(values):
+    # tables are stored little-endian, whatever the platform
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def unpacked(code, data):
+    values = array(code)
+    try:
+        values.frombytes(data)
+    except AttributeError:
+        # Python 2
+        values.fromstring(data)
+    return little_endian(values)
 
-def all_possible_pcsets():
-    for n in range(4096):
-        result = []
-        for bit in range(12):
-            if n & (2**bit):
-                result.append(bit)
-        yield PcSet(result)
+
+def bitset_bytes(bits, size):
+    return bytearray([(bits >> (8 * i)) & 255 for i in range(size)])
+
+
+def bytes_bitset(data):
+    bits = 0
+    for i, byte in enumerate(bytearray(data)):
+        bits |= byte << (8 * i)
+    return bits
+
+
+def read_header(storage):
+    """
+    Utility function. Reads the header of a stored file and returns the
+    checksum it records.
+    """
+    header = storage.read(HEADER_SIZE)
+    if len(header) != HEADER_SIZE or not header.startswith(MAGIC):
+        raise CorruptFileError(storage.name)
+    return header[len(MAGIC):-1].decode('ascii')
+
+
+def verify(storage):
+    """
+    Utility function. Checks the rest of an open stored file against the
+    checksum in its header, then rewinds to just past the header.
+    """
+    expected = read_header(storage)
+    digest = sha256()
+    while True:
+        block = storage.read(65536)
+        if not block:
+            break
+        digest.update(block)
+    if digest.hexdigest() != expected:
+        raise CorruptFileError(storage.name)
+    storage.seek(HEADER_SIZE)
+
+
+def open_temporary(filename):
+    """
+    Utility function. Opens a new, uniquely named file for writing in the
+    same directory as 'filename', so that it can later be renamed over it.
+    Returns the open file and its name.
+    """
+    directory, base = os.path.split(filename)
+    handle, name = tempfile.mkstemp(prefix=base + '.', suffix='.tmp',
+                                    dir=directory or '.')
+    return os.fdopen(handle, 'wb'), name
+
+
+def install(temporary, filename):
+    """
+    Utility function. Atomically replaces 'filename' with the finished file
+    'temporary'. Readers see either the old file or the new one, never a
+    half-written one.
+    """
+    try:
+        os.replace(temporary, filename)
+    except AttributeError:
+        # Python 2; rename is atomic on POSIX, but refuses to replace an
+        # existing file on Windows.
+        if os.name == 'nt' and os.path.exists(filename):
+            os.remove(filename)
+        os.rename(temporary, filename)
 
 
-def any_match(p, page):
-    for entry in page:
-        if exact_equality(p, entry):
-            return True
-    return False
+def lock(filename):
+    """
+    Utility function. Takes an exclusive advisory lock on 'filename' (by way
+    of a separate '.lock' file next to it), waiting for any other process
+    that holds it. Returns the lock, to be passed to unlock(), or None when
+    locking isn't available; then everything still works, but processes
+    that start together may each rebuild the catalog.
+    """
+    if fcntl is None:
+        return None
+    try:
+        handle = open(filename + '.lock', 'a')
+    except IOError:
+        return None
+    fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+    return handle
+
+
+def unlock(handle):
+    if handle is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        handle.close()
+
+
+def gcd(a, b):
+    while b:
+        a, b = b, a % b
+    return a
+
+
+def totient(n):
+    return len([k for k in range(1, n + 1) if gcd(n, k) == 1])
+
+
+def binomial(n, k):
+    if k < 0 or k > n:
+        return 0
+    result = 1
+    for i in range(min(k, n - k)):
+        result = result * (n - i) // (i + 1)
+    return result
+
+
+def count_tn_classes(modulus, n):
+    """
+    Counts the sets of cardinality n in a 'modulus'-tone equal temperament
+    that are distinct under transposition alone (binary necklaces, to the
+    mathematicians). Uses Burnside's lemma, so nothing is enumerated.
+    """
+    if n == 0 or n == modulus:
+        return 1
+    total = 0
+    for j in range(1, gcd(modulus, n) + 1):
+        if modulus % j == 0 and n % j == 0:
+            total += totient(j) * binomial(modulus // j, n // j)
+    return total // modulus
+
+
+def count_prime_classes(modulus, n):
+    """
+    Counts the prime sets of cardinality n in a 'modulus'-tone equal
+    temperament -- sets distinct under both transposition and inversion
+    (binary bracelets). Like count_tn_classes, this is Burnside's lemma:
+    the n rotations are averaged together with the n reflections.
+    count_prime_classes(12, 6) is 50, the size of page 6 in the catalog.
+    """
+    if n == 0 or n == modulus:
+        return 1
+    rotations = count_tn_classes(modulus, n) * modulus
+    if modulus % 2:
+        reflections = modulus * binomial(modulus // 2, n // 2)
+    else:
+        half = modulus // 2
+        # axes through two pitch classes...
+        through = 0
+        for axis in range(3):
+            if (n - axis) % 2 == 0:
+                through += binomial(2, axis) * binomial(half - 1,
+                                                        (n - axis) // 2)
+        # ...and axes between them.
+        between = 0
+        if n % 2 == 0:
+            between = binomial(half, n // 2)
+        reflections = half * (through + between)
+    return (rotations + reflections) // (2 * modulus)
+
+
+def gap_necklaces(n, m):
+    """
+    Utility function. Generates every sequence of n gaps (non-negative
+    integers adding up to m) which is lexicographically largest among its
+    own rotations, in descending order. This is the FKM necklace algorithm
+    with a fixed sum, run without recursion so that it can be streamed.
+
+    A set of n pitch classes is the same thing as a ring of n gaps (the
+    empty steps between one pitch class and the next), so these are the
+    transpositionally distinct sets of cardinality n in an (n + m)-tone
+    temperament.
+    """
+    a = [m] * (n + 1)      # a[0] is a sentinel
+    period = [1] * (n + 2)
+    remaining = [m] * (n + 2)
+    lowest = [0] * (n + 2)
+    t = 1
+    a[1] = m
+    lowest[1] = (m + n - 1) // n
+    while t > 0:
+        value = a[t]
+        if value < lowest[t]:
+            # choices exhausted at this position; back up one
+            t -= 1
+            a[t] -= 1
+            continue
+        p = period[t]
+        if value != a[t - p]:
+            p = t
+        if t == n:
+            if n % p == 0:
+                yield a[1:]
+            a[t] -= 1
+            continue
+        t += 1
+        period[t] = p
+        left = remaining[t - 1] - value
+        remaining[t] = left
+        if t == n:
+            lowest[t] = left
+        else:
+            lowest[t] = max(0, left - (n - t) * a[1])
+        a[t] = min(a[t - p], left)
+
+
+def is_bracelet(gaps):
+    """
+    Utility function. Given the gaps of a set from gap_necklaces, returns
+    True if no rotation of the reversed gaps is larger -- in other words,
+    if inverting the set can't give a better packed prime.
+    """
+    first = gaps[0]
+    reflected = gaps[::-1]
+    for i in range(len(gaps)):
+        if reflected[i] == first:
+            if reflected[i:] + reflected[:i] > gaps:
+                return False
+    return True
+
+
+def prime_values(modulus, n):
+    """
+    Generates the binary values (see pcsets.pcset.binaryvalue) of all the
+    prime sets of cardinality n in a 'modulus'-tone equal temperament, in
+    ascending order. For modulus 12 these are exactly the primes found by
+    PcSet.prime(), but nothing like all 2**modulus sets are visited along
+    the way; the time spent per prime is roughly constant.
+    """
+    if n == 0:
+        yield 0
+        return
+    for gaps in gap_necklaces(n, modulus - n):
+        if is_bracelet(gaps):
+            # The gaps are read from the top down: the first gap lies
+            # above the highest pitch class, and the last one is below 0.
+            value = 0
+            for gap in gaps:
+                value = (value << (gap + 1)) | 1
+            yield value
+
+
+def pitchclasses_of(value, modulus):
+    return tuple(bit for bit in range(modulus) if value & (1 << bit))
+
+
+def orbit_of(value):
+    """
+    Utility function. Applies the 24 operations T(n) and T(n)I to the binary
+    value of a set (see pcsets.pcset.binaryvalue) and returns the distinct
+    results as a list of (value, operation, n) tuples, where operation is
+    'Tn' or 'TnI' (the same names OpSet uses). When two operations produce
+    the same member, only the first one, in the order T(0)...T(11),
+    T(0)I...T(11)I, is recorded.
+    """
+    orbit = []
+    seen = set()
+    for operation, base in (('Tn', value), ('TnI', invertvalue(value))):
+        for n in range(12):
+            member = transposevalue(base, n)
+            if member not in seen:
+                seen.add(member)
+                orbit.append((member, operation, n))
+    return orbit
 
 
 class SetCatalog:
 
     """
-    A SetCatalog object, when created, goes through the 4096 possible
-    (unordered) pitch class sets and finds the unique prime forms. [For
-    more information on this, read the pcsets.catalog module docs.]
+    A SetCatalog object, when created, finds the unique prime forms among
+    the 4096 possible (unordered) pitch class sets. [For more information
+    on this, read the pcsets.catalog module docs.] It does not try every
+    one of the 4096; see prime_values() for how the primes are generated.
 
     The SetCatalog constructor accepts the following options. All have
     sensible defaults, so none are really required during routine use;
     the default conditions are shown.
 
-        SetCatalog(rebuild=False, store=True, failsafe=False)
+        SetCatalog(rebuild=False, store=True, failsafe=False, modulus=12)
 
     Returns a new SetCatalog object.  Options:
 
@@ -127,9 +447,22 @@ class SetCatalog:
           'safe against failure' to write the pickle file.  That
           is, it will ignore the IOError on opening the write.
 
+        * If 'modulus' is set to something other than 12, the catalog
+          covers that equal temperament instead: the prime sets of
+          24-TET, say.  Such catalogs are far too big to build all at
+          once, so their pages are streamed on demand and stored one
+          page per file (see stream_values).  Their entries are tuples
+          of pitch classes, since a PcSet only knows twelve.
+
     Note that if SetCatalog loads a pickle file, it leaves well enough
     alone -- it doesn't write its data back to the file.
 
+    Several processes may safely share one catalog file. It is written
+    under a temporary name and renamed into place when finished, and it
+    carries a checksum; a file that fails the check is rebuilt as if it
+    were missing. Where the platform has advisory locks (POSIX), only one
+    process rebuilds at a time, and the others wait to read its result.
+
     There are three main accessor methods.  Since these only work
     from an instance, let's assume sc = SetCatalog()
 
@@ -147,46 +480,332 @@ class SetCatalog:
           in sc:' type statements.  It will return every prime it
           knows of, in cardinality order (the 0's first, then the
           1's, etc.)
+
+    To work with the members of a set class rather than its prime,
+    there are a few more methods (12-tone catalogs only; any other
+    catalog raises ModulusError at once).  These are served from orbit
+    tables which the catalog builds once, the first time they are
+    needed -- or loads, already built, from the tables installed with
+    the package (see write_tables):
+
+        * sc.class_index(pcs) returns the position of the prime of
+          pcs in the iteration order above, so list(sc)[i] is that
+          prime.  sc.class_table() returns the whole table behind it,
+          the class index of every binary value, for classifying many
+          sets at once.
+
+        * sc.members(pcs) generates every distinct member of the set
+          class of pcs (the prime itself does not have to be given).
+          sc.member_values(pcs) returns the same members as an array
+          of binary values, and sc.orbit(pcs) pairs each of those with
+          the operation that produces it from the prime.
+
+        * sc.K(a, b) and sc.Kh(a, b) test Forte's set-complex
+          relations, and sc.complex_about(nexus) lists the whole
+          complex.  These come from an inclusion table covering every
+          pair of primes, also built once.
+
+        * sc.ivec(pcs) looks up the interval vector of the class.
     """
 
     def _rewrite(self):
-        storage = open(PICKLE_FILE, 'wb')
-        pickle.dump(self.catalog, storage, -1)
-        storage.close()
+        data = pickle.dumps(self.catalog, -1)
+        storage, temporary = open_temporary(PICKLE_FILE)
+        complete = False
+        try:
+            storage.write(header_for(sha256(data).hexdigest()))
+            storage.write(data)
+            storage.flush()
+            os.fsync(storage.fileno())
+            storage.close()
+            install(temporary, PICKLE_FILE)
+            complete = True
+        finally:
+            if not complete:
+                storage.close()
+                os.remove(temporary)
 
     def _rebuild(self):
         # self.catalog[n] = a 'page' listing primes with cardinality n
-        self.catalog = [[] for page in range(13)]
-        # Warning: if the above is defined with the shortcut
-        #     self.catalog = [[]] * 13
-        # this ends up as a list of references to the same empty set!
-        for s in all_possible_pcsets():
-            p = s.prime()
-            page = self.catalog[len(p)]
-            if not any_match(p, page):
-                page.append(p)
+        self.catalog = [[PcSet(binarylist(value))
+                         for value in prime_values(12, n)]
+                        for n in range(13)]
         if self.store:
             try:
                 self._rewrite()
-            except IOError:
+            except (IOError, OSError):
                 if not self.failsafe:
                     raise
 
     def _retrieve(self):
         storage = open(PICKLE_FILE, 'rb')
-        self.catalog = pickle.load(storage)
-        storage.close()
+        try:
+            expected = read_header(storage)
+            data = storage.read()
+        finally:
+            storage.close()
+        if sha256(data).hexdigest() != expected:
+            raise CorruptFileError(PICKLE_FILE)
+        self.catalog = pickle.loads(data)
+
+    def _tabulate(self):
+        # self.orbits[i] = orbit table for the i'th prime (see orbit_of)
+        # self.classes[value] = index of the prime for that binary value
+        self.orbits = []
+        self.classes = array('B', [0] * 4096)
+        for index, prime in enumerate(self):
+            orbit = orbit_of(binaryvalue(prime))
+            self.orbits.append(orbit)
+            for member, operation, n in orbit:
+                self.classes[member] = index
+        self.values = [array('H', [e[0] for e in o]) for o in self.orbits]
+        self.primes = list(self)
+        self.ivecs = [p.ivec() for p in self.primes]
+
+    def _relate(self):
+        # Inclusion lattice, as bitsets over class indices:
+        # self.subsets[i] = classes with a member inside prime i
+        # self.supersets[i] = classes with a member containing prime i
+        # self.complexes[i] = K about class i; self.hardcomplexes[i] = Kh
+        if self.orbits is None:
+            self._tabulate()
+        total = len(self.primes)
+        self.subsets = [0] * total
+        self.supersets = [0] * total
+        for i, prime in enumerate(self.primes):
+            value = binaryvalue(prime)
+            sub = value
+            while True:
+                j = self.classes[sub]
+                self.subsets[i] |= 1 << j
+                self.supersets[j] |= 1 << i
+                if sub == 0:
+                    break
+                sub = (sub - 1) & value
+        self.complements = [self.classes[4095 ^ binaryvalue(p)]
+                            for p in self.primes]
+        cardinality = [0] * 13
+        for i, prime in enumerate(self.primes):
+            cardinality[len(prime)] |= 1 << i
+        self.complexes = []
+        self.hardcomplexes = []
+        for i, prime in enumerate(self.primes):
+            c = self.complements[i]
+            excluded = cardinality[len(prime)] | cardinality[12 - len(prime)]
+            k = (self.subsets[i] | self.supersets[i]
+                 | self.subsets[c] | self.supersets[c])
+            kh = ((self.subsets[i] & self.subsets[c])
+                  | (self.supersets[i] & self.supersets[c]))
+            self.complexes.append(k & ~excluded)
+            self.hardcomplexes.append(kh & ~excluded)
+
+    def _pack(self):
+        # All the tables as one little-endian byte string; see _unpack.
+        if self.complexes is None:
+            self._relate()
+        total = len(self.primes)
+        width = (total + 7) // 8
+        operations = []
+        for orbit in self.orbits:
+            for member, operation, n in orbit:
+                if operation == 'TnI':
+                    n += 12
+                operations.append(n)
+        sections = [
+            array('H', [TABLES_VERSION, total]),
+            array('H', [binaryvalue(p) for p in self.primes]),
+            array('B', self.classes),
+            array('B', [len(orbit) for orbit in self.orbits]),
+            array('H', [v for values in self.values for v in values]),
+            array('B', operations),
+            array('B', [x for ivec in self.ivecs for x in ivec]),
+            ]
+        data = b''.join([packed(little_endian(a)) for a in sections])
+        for bits in self.complexes + self.hardcomplexes:
+            data += bytes(bitset_bytes(bits, width))
+        return data
+
+    def _unpack(self):
+        # Loads the tables written by write_tables(), if they are there and
+        # intact. Returns False (and changes nothing) otherwise.
+        try:
+            storage = open(TABLE_FILE, 'rb')
+        except IOError:
+            return False
+        try:
+            try:
+                verify(storage)
+            except IOError:
+                return False
+            data = storage.read()
+        finally:
+            storage.close()
+        version, total = unpacked('H', data[:4])
+        if version != TABLES_VERSION:
+            return False
+        sections = []
+        position = 4
+        for code, count in [('H', total), ('B', 4096), ('B', total),
+                            ('H', 4096), ('B', 4096), ('B', total * 6)]:
+            end = position + array(code).itemsize * count
+            sections.append(unpacked(code, data[position:end]))
+            position = end
+        primes, classes, sizes, members, operations, ivecs = sections
+        width = (total + 7) // 8
+        bitsets = []
+        for i in range(2 * total):
+            start = position + i * width
+            bitsets.append(bytes_bitset(data[start:start + width]))
+        self.classes = classes
+        self.catalog = [[] for page in range(13)]
+        self.primes = []
+        self.orbits = []
+        self.values = []
+        self.ivecs = []
+        start = 0
+        for i, value in enumerate(primes):
+            prime = PcSet(binarylist(value))
+            self.catalog[len(prime)].append(prime)
+            self.primes.append(prime)
+            end = start + sizes[i]
+            orbit = []
+            for member, n in zip(members[start:end], operations[start:end]):
+                if n < 12:
+                    orbit.append((member, 'Tn', n))
+                else:
+                    orbit.append((member, 'TnI', n - 12))
+            self.orbits.append(orbit)
+            self.values.append(members[start:end])
+            self.ivecs.append(list(ivecs[6 * i:6 * i + 6]))
+            start = end
+        self.complexes = bitsets[:total]
+        self.hardcomplexes = bitsets[total:]
+        return True
 
-    def __init__(self, rebuild=False, store=True, failsafe=False):
+    def _lookup(self, pcs):
+        if self.modulus != 12:
+            # checked first: tabulating would enumerate every page
+            raise ModulusError(self.modulus)
+        if self.orbits is None:
+            self._tabulate()
+        if not isinstance(pcs, PcSet):
+            pcs = PcSet(pcs)
+        return self.classes[binaryvalue(pcs)]
+
+    def _typecode(self):
+        # the smallest array type that holds a binary value, if any does
+        for code in 'HILQ':
+            try:
+                if array(code).itemsize * 8 >= self.modulus:
+                    return code
+            except ValueError:
+                # no 'Q' before Python 3.3
+                pass
+        return None
+
+    def _read_page(self, storage):
+        code = self._typecode()
+        while True:
+            chunk = array(code)
+            try:
+                chunk.fromfile(storage, CHUNK)
+            except EOFError:
+                # a short read still keeps whatever was there
+                for value in chunk:
+                    yield value
+                return
+            for value in chunk:
+                yield value
+
+    def _write_page(self, n):
+        # Streams a freshly enumerated page, saving it on the way through.
+        # The page file only appears under its real name once the whole
+        # page has been written and its checksum filled in.
+        filename = PAGE_FILE % (self.modulus, n)
+        storage = None
+        try:
+            storage, temporary = open_temporary(filename)
+            storage.write(header_for('0' * 64))
+        except (IOError, OSError):
+            if storage is not None:
+                # opened, but the header could not be written
+                storage.close()
+                os.remove(temporary)
+                storage = None
+            if not self.failsafe:
+                raise
+        chunk = array(self._typecode())
+        digest = sha256()
+        complete = False
+        try:
+            for value in prime_values(self.modulus, n):
+                yield value
+                if storage is not None:
+                    chunk.append(value)
+                    if len(chunk) == CHUNK:
+                        data = packed(chunk)
+                        digest.update(data)
+                        storage.write(data)
+                        del chunk[:]
+            if storage is not None:
+                data = packed(chunk)
+                digest.update(data)
+                storage.write(data)
+                storage.seek(0)
+                storage.write(header_for(digest.hexdigest()))
+                storage.flush()
+                os.fsync(storage.fileno())
+                storage.close()
+                install(temporary, filename)
+            complete = True
+        finally:
+            if storage is not None and not complete:
+                storage.close()
+                os.remove(temporary)
+
+    def _open_page(self, n):
+        # The stored page, checked and ready to read; IOError otherwise.
+        storage = open(PAGE_FILE % (self.modulus, n), 'rb')
+        try:
+            verify(storage)
+        except IOError:
+            storage.close()
+            raise
+        return storage
+
+    def __init__(self, rebuild=False, store=True, failsafe=False,
+                 modulus=12):
         self.store = store
         self.failsafe = failsafe
-        if rebuild:
+        self.rebuild = rebuild
+        self.modulus = modulus
+        self.orbits = None
+        self.complexes = None
+        if modulus != 12:
+            # pages are streamed on demand; see stream_values()
+            self.catalog = None
+        elif rebuild:
             self._rebuild()
+        elif self._unpack():
+            # precomputed tables shipped with the package
+            pass
         else:
             try:
                 self._retrieve()
             except IOError:
-                self._rebuild()
+                # Missing or corrupt. Only one process at a time gets to
+                # rebuild; the rest wait, then find its finished file.
+                if self.store:
+                    handle = lock(PICKLE_FILE)
+                else:
+                    handle = None
+                try:
+                    try:
+                        self._retrieve()
+                    except IOError:
+                        self._rebuild()
+                finally:
+                    unlock(handle)
 
     def page(self, n):
         """
@@ -199,19 +818,206 @@ class SetCatalog:
         playing cards. Since we're talking about a catalog here, pages make
         more sense.
         """
+        if self.catalog is None:
+            return list(self.stream(n))
         return list(self.catalog[n])
 
-    def __iter__(self):
-        for n in range(13):
+    def stream(self, n):
+        """
+        Generates the entries of page 'n' one at a time, in the same order
+        as page(n), without building the whole page first. For a 12-tone
+        catalog the entries are PcSets; for other moduli they are tuples of
+        pitch classes in ascending order.
+        """
+        if self.catalog is not None:
             for entry in self.catalog[n]:
                 yield entry
+            return
+        for value in self.stream_values(n):
+            yield pitchclasses_of(value, self.modulus)
+
+    def stream_values(self, n):
+        """
+        Same as stream(n), but generates the binary value of each prime
+        (see pcsets.pcset.binaryvalue) instead.
+
+        Other than the 12-tone catalog, pages are enumerated afresh unless
+        a page file (PAGE_FILE) was saved by an earlier run; the first time
+        a page is streamed all the way through, it is saved as a packed
+        array of binary values, according to the 'store' and 'failsafe'
+        options. Moduli above 64 are never saved. A page file that fails
+        its checksum is ignored and written again.
+        """
+        if self.catalog is not None:
+            for entry in self.catalog[n]:
+                yield binaryvalue(entry)
+            return
+        if self._typecode() is None or not self.store:
+            values = prime_values(self.modulus, n)
+        elif self.rebuild:
+            values = self._write_page(n)
+        else:
+            try:
+                storage = self._open_page(n)
+            except IOError:
+                values = self._write_page(n)
+            else:
+                try:
+                    for value in self._read_page(storage):
+                        yield value
+                finally:
+                    storage.close()
+                return
+        for value in values:
+            yield value
+
+    def __iter__(self):
+        for n in range(self.modulus + 1):
+            for entry in self.stream(n):
+                yield entry
 
     def __len__(self):
+        if self.catalog is None:
+            return sum([count_prime_classes(self.modulus, n)
+                        for n in range(self.modulus + 1)])
         result = 0
         for n in range(13):
             result += len(self.catalog[n])
         return result
 
+    def class_index(self, pcs):
+        """
+        Returns the index of the set class of 'pcs' -- that is, the position
+        of its prime form when iterating over the catalog. The set may be a
+        PcSet or anything PcSet() accepts. This is a single table lookup, so
+        it is much faster than comparing pcs.prime() against every page.
+        """
+        return self._lookup(pcs)
+
+    def class_table(self):
+        """
+        Returns the set class index (see class_index) of every binary value
+        from 0 to 4095 (see pcsets.pcset.binaryvalue), as an array
+        (array.array of type 'B'): table[value] is the class of that set.
+        This is the table class_index() looks in, for code that classifies
+        a great many sets and can't afford a method call for each.
+        """
+        if self.modulus != 12:
+            raise ModulusError(self.modulus)
+        if self.orbits is None:
+            self._tabulate()
+        return array('B', self.classes)
+
+    def orbit(self, pcs):
+        """
+        Returns the orbit table for the set class of 'pcs': a list of
+        (value, operation, n) tuples, one for each distinct member of the
+        class, where value is the binary value of the member (see
+        pcsets.pcset.binaryvalue) and operation(n) is the first of T(n) or
+        T(n)I that takes the prime to it.
+        """
+        index = self._lookup(pcs)
+        return list(self.orbits[index])
+
+    def members(self, pcs):
+        """
+        Generates every distinct member of the set class of 'pcs' as a new
+        PcSet, its pitch classes in ascending order. The members come in
+        orbit order: T(0)...T(11) of the prime, then T(0)I...T(11)I (see
+        orbit). A class has at most 24 members; symmetrical sets such as the
+        diminished seventh have fewer.
+        """
+        index = self._lookup(pcs)
+        for value in self.values[index]:
+            yield PcSet(binarylist(value))
+
+    def member_values(self, pcs):
+        """
+        Same as members(pcs), but returns the binary values of the members
+        as an array (array.array of type 'H') instead of generating PcSets.
+        """
+        index = self._lookup(pcs)
+        return array('H', self.values[index])
+
+    def ivec(self, pcs):
+        """
+        Returns the interval vector of 'pcs' (the same as pcs.ivec(), since
+        every member of a set class shares one) from a table. Similarity
+        measures such as pcops.R0, R1, R2 and Zpair only need these.
+        """
+        index = self._lookup(pcs)
+        return list(self.ivecs[index])
+
+    # set complexes (Forte)
+
+    def complex_bits(self, nexus, hard=False):
+        """
+        Returns the set complex about 'nexus' as a bitset: an integer in
+        which bit i is set if the i'th prime of the catalog belongs to the
+        complex (see class_index). If 'hard' is True, returns the Kh
+        subcomplex instead of K. See K(a, b) and Kh(a, b) for definitions.
+        """
+        index = self._lookup(nexus)
+        if self.complexes is None:
+            self._relate()
+        if hard:
+            return self.hardcomplexes[index]
+        return self.complexes[index]
+
+    def complex_about(self, nexus, hard=False):
+        """
+        Returns the list of primes in the set complex K about 'nexus', in
+        catalog order -- or the Kh subcomplex, if 'hard' is True.
+        """
+        bits = self.complex_bits(nexus, hard)
+        return [p for i, p in enumerate(self.primes) if bits & (1 << i)]
+
+    def K(self, a, b):
+        """
+        Checks for Forte's set-complex relation K: b, or some Tn/TnI form of
+        it, is a subset or superset of either a or the complement of a.
+        Sets of the same or complementary cardinality are never related.
+        This is equivalent to combining prime_subset_of and
+        is_prime_complement from pcsets.pcops, but every answer comes out
+        of a table built once for the whole catalog.
+        """
+        return bool(self.complex_bits(a) & (1 << self._lookup(b)))
+
+    def Kh(self, a, b):
+        """
+        Checks for Forte's relation Kh, the stronger form of K: b (under
+        Tn/TnI) is a subset of both a and its complement, or a superset of
+        both.
+        """
+        return bool(self.complex_bits(a, True) & (1 << self._lookup(b)))
+
+
+def write_tables(filename=None):
+    """
+    Generates every precomputed table the catalog uses -- the primes, the
+    class of each of the 4096 sets, the orbits, the interval vectors and
+    the K/Kh complexes -- and writes them to 'filename' (by default
+    TABLE_FILE, inside the package). setup.py calls this at build time, so
+    installed copies of pcsets load their tables from the package and
+    never compute them. Without the file, everything is computed at run
+    time as before.
+    """
+    if filename is None:
+        filename = TABLE_FILE
+    data = SetCatalog(rebuild=True, store=False)._pack()
+    storage, temporary = open_temporary(filename)
+    complete = False
+    try:
+        storage.write(header_for(sha256(data).hexdigest()))
+        storage.write(data)
+        storage.close()
+        install(temporary, filename)
+        complete = True
+    finally:
+        if not complete:
+            storage.close()
+            os.remove(temporary)
+
 
 def showcatalog():
     print("Generating prime set catalog... (this may take a moment)")
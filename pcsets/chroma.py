@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+
+# pcsets 2.0.2 -- Pitch Class Sets for Python.
+#
+# Copyright 2007 Bruce H. McCosar
+#
+# This file is part of the package 'pcsets'
+#
+# The package 'pcsets' is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3 of
+# the License, or (at your option) any later version.
+#
+# The package 'pcsets' is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+chroma.py -- pitch class sets from chroma vectors
+
+Audio analysis describes sound as a series of 'chroma' frames: twelve
+numbers per frame, the strength of each pitch class. This module decides
+which pitch classes are present in each frame and returns the answer as
+binary values of sets (see pcsets.pcset.binaryvalue).
+
+    chroma_values(frames) : for a list of frames (each 12 numbers), or
+                            one flat array of N * 12 numbers.
+
+    load_chroma(filename) : for an N x 12 array of floats saved in the
+                            NumPy .npy format, which is memory mapped.
+
+Both return two arrays: the indices of the frames, array('L'), and the
+binary values of their sets, array('H'). The options are:
+
+    * threshold : a pitch class is present when its strength is at least
+                  this much (and more than zero).
+
+    * relative  : if True (the default), the threshold is a fraction of the
+                  strongest pitch class in the frame; if False, it is an
+                  absolute strength.
+
+    * low       : hysteresis. A pitch class that is present stays present
+                  until its strength falls below 'low' (relative or absolute,
+                  like the threshold), which keeps noisy pitch classes from
+                  flickering on and off.
+
+    * top       : at most this many pitch classes per frame: the strongest.
+
+    * collapse  : if True, a run of frames with the same set is returned
+                  only once, with the index of the first frame of the run.
+
+Example: three frames, the last two of them C major.
+
+    >>> from pcsets.chroma import *
+    >>> frames = [[0.9] + [0.1] * 11, [1, 0, 0, 0, 0.8, 0, 0, 0.7, 0, 0, 0, 0],
+    ...           [1, 0, 0, 0, 0.9, 0, 0, 0.6, 0, 0, 0.2, 0]]
+    >>> print chroma_values(frames, collapse=True)
+    (array('L', [0, 1]), array('H', [1, 145]))
+
+
+EXPERIMENTAL MODULE -- interface may change.
+"""
+
+from __future__ import print_function
+
+__metaclass__ = type
+
+__all__ = """
+ChromaFormatError
+chroma_values
+load_chroma
+""".split()
+
+import ast
+import heapq
+import struct
+import sys
+from array import array
+
+try:
+    import mmap
+except ImportError:
+    # files are read into memory instead
+    mmap = None
+
+from .pcset import PcSetException
+
+NPY_MAGIC = b'\x93NUMPY'
+
+# The .npy element types that can be read, with their array typecodes.
+NPY_TYPES = {'f4': 'f', 'f8': 'd'}
+
+BITS = [1 << pc for pc in range(12)]
+
+
+class ChromaFormatError(PcSetException):
+    """
+    Chroma frames must have 12 values each, and a .npy file must hold a
+    C-ordered N x 12 array of 32 or 64 bit floats.
+    The problem found was: %(problem)s
+    """
+    def __init__(self, problem):
+        self.message = self.__doc__ % {'problem': problem}
+
+
+def frame_value(frame, threshold, relative, low, top, previous):
+    """
+    Utility function. Returns the binary value of the set for one frame of
+    12 strengths; 'previous' is the value for the frame before (used only
+    for hysteresis).
+    """
+    if relative:
+        scale = max(frame)
+        if scale <= 0:
+            return 0
+    else:
+        scale = 1
+    cut = threshold * scale
+    value = 0
+    if low is None:
+        for pc in range(12):
+            strength = frame[pc]
+            if strength >= cut and strength > 0:
+                value |= BITS[pc]
+    else:
+        hold = low * scale
+        for pc in range(12):
+            strength = frame[pc]
+            if strength > 0 and (strength >= cut
+                                 or (previous & BITS[pc]
+                                     and strength >= hold)):
+                value |= BITS[pc]
+    if top is not None and bin(value).count('1') > top:
+        present = [pc for pc in range(12) if value & BITS[pc]]
+        value = 0
+        for pc in heapq.nlargest(top, present, key=frame.__getitem__):
+            value |= BITS[pc]
+    return value
+
+
+def flat_frames(values):
+    """
+    Utility function. Generates the frames of a flat sequence of N * 12
+    numbers, 12 at a time.
+    """
+    if len(values) % 12:
+        raise ChromaFormatError('%d values is not a whole number of frames'
+                                % len(values))
+    for start in range(0, len(values), 12):
+        yield values[start:start + 12]
+
+
+def chroma_values(frames, threshold=0.5, relative=True, low=None, top=None,
+                  collapse=False):
+    """
+    Returns (indices, values) for a series of chroma frames: 'frames' is an
+    iterable of frames of 12 numbers each, or an array (or memoryview) of
+    N * 12 numbers. See the module documentation for the options.
+    """
+    if isinstance(frames, (array, memoryview)):
+        frames = flat_frames(frames)
+    if low is not None and low > threshold:
+        raise ValueError('low must not be more than threshold')
+    indices = array('L')
+    values = array('H')
+    value = 0
+    for index, frame in enumerate(frames):
+        if len(frame) != 12:
+            raise ChromaFormatError('frame %d has %d values'
+                                    % (index, len(frame)))
+        previous = value
+        value = frame_value(frame, threshold, relative, low, top, previous)
+        if collapse and index and value == previous:
+            continue
+        indices.append(index)
+        values.append(value)
+    return indices, values
+
+
+def npy_header(data):
+    """
+    Utility function. Reads the header of .npy data; returns the array
+    typecode, the number of frames, whether the bytes must be swapped, and
+    the position of the first value.
+    """
+    if data[:6] != NPY_MAGIC or len(data) < 10:
+        raise ChromaFormatError('not a .npy file')
+    major = bytearray(data[6:7])[0]
+    if major == 1:
+        size = struct.unpack('<H', data[8:10])[0]
+        start = 10
+    else:
+        size = struct.unpack('<I', data[8:12])[0]
+        start = 12
+    try:
+        header = ast.literal_eval(data[start:start + size].decode('latin1'))
+        descr = header['descr']
+        shape = header['shape']
+        fortran = header['fortran_order']
+    except (ValueError, SyntaxError, KeyError, TypeError):
+        raise ChromaFormatError('unreadable .npy header')
+    if fortran:
+        raise ChromaFormatError('Fortran ordered array')
+    if len(shape) != 2 or shape[1] != 12:
+        raise ChromaFormatError('array shape is %r' % (shape,))
+    order, kind = descr[0], descr[1:]
+    if kind not in NPY_TYPES:
+        raise ChromaFormatError('array type is %r' % descr)
+    native = '<' if sys.byteorder == 'little' else '>'
+    swap = order in '<>' and order != native
+    return NPY_TYPES[kind], shape[0], swap, start + size
+
+
+def load_chroma(filename, threshold=0.5, relative=True, low=None, top=None,
+                collapse=False):
+    """
+    Returns (indices, values) for the chroma frames saved in the .npy file
+    'filename' -- an N x 12 array of floats, such as numpy.save writes. The
+    file is memory mapped, and used in place whenever its byte order is
+    the machine's own. See the module documentation for the options.
+    """
+    with open(filename, 'rb') as f:
+        mapping = None
+        if mmap is not None:
+            try:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (EnvironmentError, ValueError):
+                # an empty file can't be mapped
+                pass
+        data = mapping if mapping is not None else f.read()
+    try:
+        code, count, swap, start = npy_header(data)
+        end = start + count * 12 * array(code).itemsize
+        if len(data) < end:
+            raise ChromaFormatError('file is shorter than its header says')
+        try:
+            view = memoryview(data)[start:end]
+        except TypeError:
+            # Python 2 memory maps have no buffer interface
+            view = memoryview(data[start:end])
+        try:
+            if swap:
+                raise AttributeError
+            flat = view.cast(code)
+        except (AttributeError, TypeError):
+            # byte-swapped data (or no memoryview.cast): copy it
+            flat = array(code)
+            try:
+                flat.frombytes(view.tobytes())
+            except AttributeError:
+                # Python 2
+                flat.fromstring(view.tobytes())
+            if swap:
+                flat.byteswap()
+        try:
+            return chroma_values(flat, threshold, relative, low, top,
+                                 collapse)
+        finally:
+            if isinstance(flat, memoryview):
+                flat.release()
+            if hasattr(view, 'release'):
+                # not before Python 3.2
+                view.release()
+    finally:
+        if mapping is not None:
+            mapping.close()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+
+# pcsets 2.0.2 -- Pitch Class Sets for Python.
+#
+# Copyright 2007 Bruce H. McCosar
+#
+# This file is part of the package 'pcsets'
+#
+# The package 'pcsets' is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3 of
+# the License, or (at your option) any later version.
+#
+# The package 'pcsets' is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+corpus.py -- large files of spec strings
+
+Reads text files holding one PcSet spec string per line (such as '0146A'),
+optionally followed by other columns of data, straight into arrays:
+
+    read_corpus(f)  : decodes the whole file, using several processes if
+                      asked to, and returns it as a Corpus.
+
+    chunks(f)       : generates the file as a series of smaller Corpus
+                      objects, a block of lines at a time.
+
+A Corpus keeps, for every line, the binary value of its set (see
+pcsets.pcset.binaryvalue) in the array 'masks', and the pitch classes in
+their written order -- the set as a segment -- in the array 'pcs', where
+line i covers pcs[offsets[i]:offsets[i + 1]]. Any other columns are kept
+as lists of strings in 'columns'.
+
+The file is memory mapped, not read, and every character is decoded with a
+precomputed table rather than by PcSet(), so even files of several gigabytes
+can be loaded quickly. The results are just what PcSet() would make of each
+spec string: 'A' and 'B' stand for 10 and 11, and repeated pitch classes are
+dropped. Blank lines are skipped.
+
+Example:
+
+    >>> from pcsets.corpus import *
+    >>> corpus = read_corpus('chords.txt')
+    >>> print len(corpus), corpus.masks[0], corpus.pcset(0)
+    3 145 047
+
+
+EXPERIMENTAL MODULE -- interface may change.
+"""
+
+from __future__ import print_function
+
+__metaclass__ = type
+
+__all__ = """
+Corpus
+read_corpus
+chunks
+""".split()
+
+from array import array
+from multiprocessing import Pool, cpu_count
+
+try:
+    import mmap
+except ImportError:
+    # files are read into memory instead
+    mmap = None
+
+from .pcset import PcSet
+
+# Approximate number of bytes decoded at a time.
+CHUNK_SIZE = 1 << 20
+
+# Largest number of distinct spec strings remembered while decoding.
+SPEC_MEMORY = 65536
+
+# The pitch class of every byte; ILLEGAL for anything but 0-9, A and B.
+ILLEGAL = 255
+SPEC_TABLE = bytearray([ILLEGAL] * 256)
+for pc, character in enumerate(b'0123456789AB'.decode('ascii')):
+    SPEC_TABLE[ord(character)] = pc
+
+
+class Corpus:
+    """
+    The decoded contents of a file of spec strings: for line i, the binary
+    value masks[i], the segment pcs[offsets[i]:offsets[i + 1]], and (if
+    they were asked for) the other columns, columns[i].
+    """
+
+    def __init__(self, columns=False):
+        self.masks = array('H')
+        self.offsets = array('L', [0])
+        self.pcs = array('B')
+        self.columns = [] if columns else None
+
+    def __len__(self):
+        return len(self.masks)
+
+    def __iter__(self):
+        for i in range(len(self.masks)):
+            yield self.pcset(i)
+
+    def segment(self, i):
+        """
+        Returns the pitch classes of line i in their written order.
+        """
+        return self.pcs[self.offsets[i]:self.offsets[i + 1]].tolist()
+
+    def pcset(self, i):
+        """
+        Returns line i as a PcSet.
+        """
+        return PcSet(self.segment(i))
+
+    def extend(self, other):
+        """
+        Appends the lines of another Corpus to this one.
+        """
+        base = self.offsets[-1]
+        self.masks.extend(other.masks)
+        self.offsets.extend([base + n for n in other.offsets[1:]])
+        self.pcs.extend(other.pcs)
+        if self.columns is not None and other.columns is not None:
+            self.columns.extend(other.columns)
+
+
+def decode_spec(spec):
+    """
+    Utility function. Returns (mask, segment) for the spec string 'spec'
+    (as bytes), or None if it contains an illegal character.
+    """
+    mask = 0
+    segment = bytearray()
+    for byte in bytearray(spec):
+        pc = SPEC_TABLE[byte]
+        if pc == ILLEGAL:
+            return None
+        if not mask & (1 << pc):
+            mask |= 1 << pc
+            segment.append(pc)
+    return mask, bytes(segment)
+
+
+def is_data(source):
+    """
+    Utility function. Tells the contents of a file from a file name. On
+    Python 2 both are str; there a str is taken as contents if it is empty
+    or holds a newline -- which no sensible file name does.
+    """
+    if isinstance(source, bytearray):
+        return True
+    if not isinstance(source, bytes):
+        return False
+    return bytes is not str or not source or b'\n' in source
+
+
+def mapped(source):
+    """
+    Utility function. Returns (data, mapping) -- the bytes of 'source', a
+    file name or the bytes themselves, and the memory map to close
+    afterwards (or None).
+    """
+    if is_data(source):
+        return source, None
+    with open(source, 'rb') as f:
+        if mmap is not None:
+            try:
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (EnvironmentError, ValueError):
+                # an empty file can't be mapped
+                pass
+            else:
+                return mapping, mapping
+        return f.read(), None
+
+
+def line_ranges(data, start, end, size):
+    """
+    Utility function. Divides data[start:end] into ranges of about 'size'
+    bytes, each ending just after a newline (or at 'end').
+    """
+    ranges = []
+    while start < end:
+        stop = data.find(b'\n', min(start + size, end) - 1, end)
+        stop = end if stop < 0 else stop + 1
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def line_start(data, pos):
+    """
+    Utility function. Returns the position of the first line starting at or
+    after 'pos'.
+    """
+    if pos <= 0:
+        return 0
+    found = data.find(b'\n', pos - 1)
+    return len(data) if found < 0 else found + 1
+
+
+def decode(data, start, end, columns=False, delimiter=b'\t', errors=None,
+           known=None):
+    """
+    Decodes the lines of data[start:end] (which must start at the beginning
+    of a line) into a new Corpus. Lines with illegal characters are skipped,
+    and (offset, line) is appended to 'errors' for each of them, if it is a
+    list.
+    """
+    corpus = Corpus(columns)
+    masks = corpus.masks
+    offsets = corpus.offsets
+    pcs = corpus.pcs
+    if known is None:
+        known = {}
+    separator = delimiter.decode('utf-8')
+    for first, stop in line_ranges(data, start, end, CHUNK_SIZE):
+        offset = first
+        for line in data[first:stop].split(b'\n'):
+            where = offset
+            offset += len(line) + 1
+            line = line.rstrip(b'\r')
+            if not line.strip():
+                continue
+            fields = line.split(delimiter, 1)
+            spec = fields[0].strip()
+            try:
+                decoded = known[spec]
+            except KeyError:
+                decoded = decode_spec(spec)
+                if len(known) >= SPEC_MEMORY:
+                    known.clear()
+                known[spec] = decoded
+            if decoded is None:
+                if errors is not None:
+                    errors.append((where, line.decode('utf-8', 'replace')))
+                continue
+            masks.append(decoded[0])
+            pcs.extend(bytearray(decoded[1]))
+            offsets.append(len(pcs))
+            if columns:
+                rest = fields[1] if len(fields) > 1 else b''
+                corpus.columns.append(rest.decode('utf-8').split(separator))
+    return corpus
+
+
+def chunks(source, size=CHUNK_SIZE, columns=False, delimiter=b'\t',
+           errors=None):
+    """
+    Generates the lines of 'source' (a file name, or the contents of a file
+    as bytes) as a series of Corpus objects, each holding whole lines from
+    about 'size' bytes of the file. See decode for 'columns', 'delimiter'
+    and 'errors'.
+    """
+    data, mapping = mapped(source)
+    try:
+        known = {}
+        for start, end in line_ranges(data, 0, len(data), size):
+            yield decode(data, start, end, columns, delimiter, errors, known)
+    finally:
+        if mapping is not None:
+            mapping.close()
+
+
+def decode_part(job):
+    # for read_corpus; must live at module level to be pickled
+    filename, start, end, columns, delimiter = job
+    data, mapping = mapped(filename)
+    try:
+        start = line_start(data, start)
+        end = line_start(data, end)
+        errors = []
+        return decode(data, start, end, columns, delimiter, errors), errors
+    finally:
+        if mapping is not None:
+            mapping.close()
+
+
+def read_corpus(source, columns=False, delimiter=b'\t', errors=None,
+                processes=1):
+    """
+    Reads a whole file of spec strings, one per line, and returns a Corpus.
+    'source' is a file name, or the contents of a file as bytes.
+
+    If 'columns' is True, anything after the spec string on each line is
+    kept too, split into a list of strings at each 'delimiter' (a tab, by
+    default). Lines with illegal characters are skipped; if 'errors' is a
+    list, (offset, line) is appended to it for each of them, where offset
+    is the position of the line in the file.
+
+    With 'processes' greater than 1, a file (not bytes) is divided into
+    that many parts, which are decoded by a pool of worker processes and
+    then joined in order; processes=None uses one process per CPU.
+    """
+    if processes is None:
+        processes = cpu_count()
+    if processes == 1 or is_data(source):
+        corpus = Corpus(columns)
+        for part in chunks(source, CHUNK_SIZE, columns, delimiter, errors):
+            corpus.extend(part)
+        return corpus
+    data, mapping = mapped(source)
+    size = len(data)
+    if mapping is not None:
+        mapping.close()
+    step = size // processes + 1
+    jobs = [(source, n, min(n + step, size), columns, delimiter)
+            for n in range(0, size, step)]
+    corpus = Corpus(columns)
+    pool = Pool(processes)
+    try:
+        for part, found in pool.imap(decode_part, jobs):
+            corpus.extend(part)
+            if errors is not None:
+                errors.extend(found)
+    except BaseException:
+        # don't wait for the other parts to be decoded first
+        pool.terminate()
+        pool.join()
+        raise
+    pool.close()
+    pool.join()
+    return corpus
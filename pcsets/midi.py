@@ -0,0 +1,465 @@
+#!/usr/bin/env python
+
+# pcsets 2.0.2 -- Pitch Class Sets for Python.
+#
+# Copyright 2007 Bruce H. McCosar
+#
+# This file is part of the package 'pcsets'
+#
+# The package 'pcsets' is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3 of
+# the License, or (at your option) any later version.
+#
+# The package 'pcsets' is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+midi.py -- Standard MIDI File input
+
+Reads the notes of Standard MIDI Files (.mid) and turns them into sequences
+of pitch class sets, with no help from anything outside the standard library.
+
+    simultaneities(f)  : generates (time, PcSet) every time the set of
+                         sounding pitch classes changes.
+
+    windows(f, width)  : generates (time, PcSet) for every window of 'width'
+                         seconds -- all the pitch classes sounding at any
+                         moment of that window.
+
+    mask_arrays(f)     : either of the above, collected as two arrays: the
+                         times (in seconds) and the sets' binary values.
+
+    read_many(paths)   : mask_arrays for a whole list of files or
+                         directories, spread over a pool of processes.
+
+'f' may be a file name, an open binary file, or the bytes of a file. Files
+on disk are memory mapped rather than read, and the tracks are merged event
+by event, so a file is never held in memory as a whole -- only one pending
+event per track. Times are in seconds, following the file's tempo changes.
+(Python 2 is the exception: its memory maps can't be read byte by byte as
+numbers, so there the file is copied into memory.)
+
+By default, channel 10 (the General MIDI percussion channel) is skipped, since
+its 'notes' are drum sounds rather than pitches; pass drums=True to keep it.
+
+Example: a C major chord followed by an F major chord.
+
+    >>> from pcsets.midi import *
+    >>> for time, pcs in simultaneities('cadence.mid'):
+    ...     print time, pcs
+    0.0 047
+    0.5 059
+
+
+EXPERIMENTAL MODULE -- interface may change.
+"""
+
+from __future__ import print_function
+
+__metaclass__ = type
+
+__all__ = """
+MidiFormatError
+simultaneities
+windows
+mask_arrays
+read_many
+midi_files
+""".split()
+
+import heapq
+import os
+from array import array
+from multiprocessing import Pool
+
+try:
+    import mmap
+except ImportError:
+    # files are read into memory instead
+    mmap = None
+
+from .pcset import PcSet, PcSetException, binarylist
+
+# Event kinds. The kind plays no part in the order of events: those at the
+# same tick are applied track by track, and in file order within a track,
+# so a note struck and released at once still ends up released.
+NOTE_OFF = 0
+NOTE_ON = 1
+TEMPO = 2
+
+# Microseconds per quarter note until the first tempo change (120 bpm).
+DEFAULT_TEMPO = 500000
+
+DRUM_CHANNEL = 9
+
+MIDI_EXTENSIONS = ('.mid', '.midi', '.smf')
+
+# Data bytes following each channel message status (by high nibble).
+DATA_BYTES = {0x8: 2, 0x9: 2, 0xA: 2, 0xB: 2, 0xC: 1, 0xD: 1, 0xE: 2}
+
+# Python 2 indexes bytes and memory maps as 1-character strings, not ints;
+# there the file is copied into a bytearray, which indexes as ints.
+INDEXES_AS_INTS = isinstance(b'M'[0], int)
+
+
+class MidiFormatError(PcSetException):
+    """
+    Not a readable Standard MIDI File: %(problem)s
+    """
+    def __init__(self, problem):
+        self.message = self.__doc__ % {'problem': problem}
+
+
+def file_data(source):
+    """
+    Utility function. Returns (data, mapping) -- the bytes of a MIDI file
+    as something that indexes as ints, and the memory map to close
+    afterwards (or None).
+    """
+    data, mapping = raw_data(source)
+    if not INDEXES_AS_INTS and not isinstance(data, bytearray):
+        data = bytearray(data[:])
+    return data, mapping
+
+
+def is_data(source):
+    """
+    Utility function. Tells the bytes of a file from a file name. On Python
+    2 both are str; there a str is taken as a file's bytes if it is empty,
+    starts with a header chunk, or holds a NUL -- which no file name can.
+    """
+    if isinstance(source, bytearray):
+        return True
+    if not isinstance(source, bytes):
+        return False
+    if bytes is not str:
+        return True
+    return not source or source.startswith(b'MThd') or b'\0' in source
+
+
+def raw_data(source):
+    # file_data, before any conversion
+    if is_data(source):
+        return source, None
+    if not hasattr(source, 'read'):
+        with open(source, 'rb') as f:
+            return raw_data(f)
+    if mmap is not None:
+        try:
+            mapping = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, EnvironmentError, ValueError):
+            # not a regular file, or an empty one
+            pass
+        else:
+            return mapping, mapping
+    return source.read(), None
+
+
+def varlen(data, pos, end):
+    """
+    Utility function. Reads a variable-length quantity; returns the value
+    and the position after it.
+    """
+    value = 0
+    while pos < end:
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if byte < 0x80:
+            return value, pos
+    raise MidiFormatError('track ends inside a delta time or length')
+
+
+def word(data, pos, size):
+    value = 0
+    for byte in data[pos:pos + size]:
+        value = (value << 8) | byte
+    return value
+
+
+def track_events(data, start, end, track):
+    """
+    Generates (tick, track, sequence, kind, value) for the note and tempo
+    events of the track between 'start' and 'end'. Notes have the value
+    channel * 128 + key; tempos have the value in microseconds per quarter.
+
+    Reading is lenient where real files commonly break the rules: running
+    status survives meta and system exclusive events, and a track may end
+    without an end of track event.
+    """
+    pos = start
+    tick = 0
+    running = 0
+    sequence = 0
+    while pos < end:
+        delta, pos = varlen(data, pos, end)
+        tick += delta
+        if pos >= end:
+            raise MidiFormatError('track %d ends inside an event' % track)
+        status = data[pos]
+        if status == 0xFF:
+            if pos + 1 >= end:
+                raise MidiFormatError('track %d ends inside an event' % track)
+            meta = data[pos + 1]
+            length, pos = varlen(data, pos + 2, end)
+            if meta == 0x2F:
+                return
+            if meta == 0x51 and length == 3 and pos + 3 <= end:
+                sequence += 1
+                yield tick, track, sequence, TEMPO, word(data, pos, 3)
+            pos += length
+            continue
+        if status == 0xF0 or status == 0xF7:
+            length, pos = varlen(data, pos + 1, end)
+            pos += length
+            continue
+        if status >= 0x80:
+            running = status
+            pos += 1
+        elif not running:
+            raise MidiFormatError('running status without a status byte')
+        message = running >> 4
+        if message not in DATA_BYTES:
+            raise MidiFormatError('unknown status byte %02X' % running)
+        size = DATA_BYTES[message]
+        if pos + size > end:
+            raise MidiFormatError('track %d ends inside an event' % track)
+        if message == 0x8 or message == 0x9:
+            key = data[pos]
+            kind = NOTE_ON if message == 0x9 and data[pos + 1] else NOTE_OFF
+            sequence += 1
+            yield tick, track, sequence, kind, ((running & 0xF) << 7) | key
+        pos += size
+
+
+def tracks(data):
+    """
+    Utility function. Checks the header chunk; returns the time division
+    and a list of (start, end) positions of the track chunks.
+    """
+    if data[:4] != b'MThd' or len(data) < 14:
+        raise MidiFormatError('no MThd header')
+    length = word(data, 4, 4)
+    ntracks = word(data, 10, 2)
+    division = word(data, 12, 2)
+    if length < 6 or not division:
+        raise MidiFormatError('bad header chunk')
+    found = []
+    pos = 8 + length
+    while pos + 8 <= len(data) and len(found) < ntracks:
+        size = word(data, pos + 4, 4)
+        if data[pos:pos + 4] == b'MTrk':
+            found.append((pos + 8, min(pos + 8 + size, len(data))))
+        pos += 8 + size
+    if not found:
+        raise MidiFormatError('no tracks')
+    return division, found
+
+
+def tick_groups(source, drums=False):
+    """
+    Generates (time, onsets, sounding) for every tick at which notes start
+    or stop: the time in seconds, the binary value of the pitch classes
+    struck at that moment, and the binary value of the pitch classes still
+    sounding afterwards.
+
+    Tracks are merged in time order (format 2 files are read as if their
+    tracks were played together, like format 1).
+    """
+    data, mapping = file_data(source)
+    try:
+        division, chunks = tracks(data)
+        if division & 0x8000:
+            # SMPTE time: frames per second and ticks per frame
+            fps = 256 - (division >> 8)
+            if fps == 29:
+                fps = 29.97
+            per_tick = 1.0 / (fps * (division & 0xFF))
+            tempo_ticks = None
+        else:
+            tempo_ticks = division
+            per_tick = DEFAULT_TEMPO / 1e6 / division
+        merged = heapq.merge(*[track_events(data, start, end, n)
+                               for n, (start, end) in enumerate(chunks)])
+        held = bytearray(16 * 128)
+        counts = [0] * 12
+        sounding = 0
+        onsets = 0
+        changed = False
+        time = 0.0
+        last = 0
+        for tick, track, sequence, kind, value in merged:
+            if tick != last:
+                if changed:
+                    yield time, onsets, sounding
+                    onsets = 0
+                    changed = False
+                time += (tick - last) * per_tick
+                last = tick
+            if kind == TEMPO:
+                if tempo_ticks:
+                    per_tick = value / 1e6 / tempo_ticks
+                continue
+            if value >> 7 == DRUM_CHANNEL and not drums:
+                continue
+            pc = (value & 0x7F) % 12
+            if kind == NOTE_ON:
+                if held[value] < 255:
+                    held[value] += 1
+                counts[pc] += 1
+                onsets |= 1 << pc
+                sounding |= 1 << pc
+                changed = True
+            elif held[value]:
+                held[value] -= 1
+                counts[pc] -= 1
+                if not counts[pc]:
+                    sounding &= ~(1 << pc)
+                changed = True
+        if changed:
+            yield time, onsets, sounding
+    finally:
+        if mapping is not None:
+            mapping.close()
+
+
+def simultaneities(source, drums=False, masks=False):
+    """
+    Generates (time, pcs) every time the set of sounding pitch classes
+    changes: the time in seconds, and the PcSet of every pitch class
+    sounding at that moment (or just struck, even if it stops at once).
+    With 'masks' = True, the set's binary value is generated instead.
+
+    Rests are not generated, and a chord struck again without a change
+    is not generated twice -- only changes are.
+    """
+    previous = 0
+    for time, onsets, sounding in tick_groups(source, drums):
+        value = sounding | onsets
+        if value and value != previous:
+            yield time, result(value, masks)
+        previous = value
+
+
+def windows(source, width, drums=False, masks=False):
+    """
+    Generates (time, pcs) for consecutive windows 'width' seconds wide,
+    from the start of the file to the last note: the window's start time,
+    and the PcSet of every pitch class sounding at any moment during it
+    (the empty set if none). With 'masks' = True, the set's binary value is
+    generated instead.
+    """
+    if width <= 0:
+        raise ValueError('window width must be positive')
+    index = 0
+    window = 0
+    sounding = 0
+    for time, onsets, after in tick_groups(source, drums):
+        current = int(time // width)
+        if current > index:
+            yield index * width, result(window, masks)
+            for index in range(index + 1, current):
+                yield index * width, result(sounding, masks)
+            index = current
+            # notes stopping right at the start of a window don't count
+            window = sounding if time > current * width else 0
+        window |= onsets | after
+        sounding = after
+    if window:
+        yield index * width, result(window, masks)
+
+
+def result(value, masks):
+    if masks:
+        return value
+    return PcSet(binarylist(value))
+
+
+def mask_arrays(source, width=None, drums=False):
+    """
+    Collects simultaneities(source) -- or windows(source, width), if a width
+    is given -- as two arrays: array('d') of the times and array('H') of
+    the binary values of the sets.
+    """
+    times = array('d')
+    values = array('H')
+    if width is None:
+        sets = simultaneities(source, drums, masks=True)
+    else:
+        sets = windows(source, width, drums, masks=True)
+    for time, value in sets:
+        times.append(time)
+        values.append(value)
+    return times, values
+
+
+def midi_files(directory):
+    """
+    Returns the sorted paths of all the MIDI files under 'directory' (by
+    extension, see MIDI_EXTENSIONS), searching subdirectories too.
+    """
+    found = []
+    for root, dirs, files in os.walk(directory):
+        for name in files:
+            if os.path.splitext(name)[1].lower() in MIDI_EXTENSIONS:
+                found.append(os.path.join(root, name))
+    found.sort()
+    return found
+
+
+def read_file(job):
+    # for read_many; must live at module level to be pickled
+    path, width, drums = job
+    try:
+        times, values = mask_arrays(path, width, drums)
+    except (MidiFormatError, EnvironmentError) as e:
+        return path, None, None, str(e)
+    return path, times, values, None
+
+
+def read_many(paths, width=None, drums=False, processes=None,
+              chunksize=8):
+    """
+    Runs mask_arrays(path, width, drums) for every file in 'paths', and
+    every MIDI file under any directory in 'paths' (see midi_files).
+    Generates (path, times, values, error) in order as the files are done;
+    if a file can't be read, times and values are None and error is the
+    reason.
+
+    The files are shared out among 'processes' worker processes (by default,
+    one per CPU); processes=1 reads them all in this process instead.
+    """
+    jobs = job_list(paths, width, drums)
+    if processes == 1:
+        for job in jobs:
+            yield read_file(job)
+        return
+    pool = Pool(processes)
+    try:
+        for found in pool.imap(read_file, jobs, chunksize):
+            yield found
+    except BaseException:
+        # stopped early (GeneratorExit) or failed: drop the files still
+        # queued rather than waiting for the workers to read them all
+        pool.terminate()
+        pool.join()
+        raise
+    pool.close()
+    pool.join()
+
+
+def job_list(paths, width, drums):
+    if isinstance(paths, str):
+        paths = [paths]
+    for path in paths:
+        if os.path.isdir(path):
+            for name in midi_files(path):
+                yield name, width, drums
+        else:
+            yield path, width, drums
@@ -31,7 +31,16 @@ A module that provides translation functions between named notes (for example,
 
     pcfor(s)   : return the equivalent PcSet for the named notes in s.
 
+    pcfor_many(text) : pcfor() for every line of a string or text file.
+
     notes(pcs) : return the equivalent named notes for the PcSet pcs.
+                 (notes(pcs, 'Eb') names them as written in E flat major.)
+
+    notes_many(sets) : notes() for a whole stream of PcSets, one at a time
+                       (write_notes(sets, f) writes them to a file).
+
+    notes_progression(sets) : the same for a list of PcSets, spelled
+                              consistently from one set to the next.
 
 The function 'notes' can even handle lists of integers and raw pitch class set
 specification strings (such as '0135A').
@@ -68,10 +77,20 @@ __metaclass__ = type
 __all__ = """
 TranslationError
 pcfor
+pcfor_many
 notes
+notes_many
+value_notes
+write_notes
+notes_progression
+SPELLINGS
 """.split()
 
-from .pcset import PcSet, PcSetException
+from collections import OrderedDict
+from itertools import product
+from threading import Lock
+
+from .pcset import PcSet, PcSetException, binaryvalue, binarylist
 
 # If this is set to True, then the minconflict function will terminate with an
 # exception when the first three rules fail to narrow a PcSet down to a single
@@ -82,6 +101,8 @@ PERFECTION_TESTING = False
 UFLAT = u"\u266D"
 UNATURAL = u"\u266E"
 USHARP = u"\u266F"
+UDOUBLEFLAT = u"\U0001D12B"
+UDOUBLESHARP = u"\U0001D12A"
 
 CSCALE = list("C-D-EF-G-A-B")
 
@@ -151,6 +172,16 @@ class IllegalModifierError(TranslationError):
         self.message = self.__doc__ % {'problem': p, 'setting': s}
 
 
+class UnknownKeyError(TranslationError):
+    """
+    A key must be named by its tonic, with at most seven sharps or flats
+    in its signature, such as 'Eb' or 'F#m' (add 'm' for a minor key).
+    The problem found was: %(problem)r
+    """
+    def __init__(self, s):
+        self.message = self.__doc__ % {'problem': s}
+
+
 class PerfectionTestingFailure(PcSetException):
     """
     The first three minimum conflict rules failed to narrow the possible
@@ -224,7 +255,125 @@ def pcfor(spec):
         notelist = spec.split()
     except AttributeError:
         raise NonStringError(spec)
-    return PcSet([pitchclass_of(note) for note in notelist])
+    table = NOTE_TABLES[False]
+    pcs = []
+    for note in notelist:
+        try:
+            pcs.append(table[note])
+        except KeyError:
+            # not a note; let pitchclass_of say why
+            pcs.append(pitchclass_of(note))
+    return PcSet(pcs)
+
+
+def note_table(doubles=False):
+    """
+    Utility function. Compiles a dictionary from every note name pcfor()
+    accepts (including the unicode accidentals) to its pitch class. If
+    'doubles' is True, double flats and double sharps are included too:
+    'bb', '##', 'x', and their unicode forms.
+    """
+    accidentals = [('', 0), (UNATURAL, 0),
+                   ('b', -1), (UFLAT, -1),
+                   ('#', 1), (USHARP, 1)]
+    if doubles:
+        accidentals += [('bb', -2), (UFLAT * 2, -2), (UDOUBLEFLAT, -2),
+                        ('##', 2), (USHARP * 2, 2), ('x', 2),
+                        (UDOUBLESHARP, 2)]
+    table = {}
+    for base in "CDEFGAB":
+        for accidental, change in accidentals:
+            table[base + accidental] = (CSCALE.index(base) + change) % 12
+    return table
+
+
+# note_table() for each setting of 'doubles'
+NOTE_TABLES = {False: note_table(False), True: note_table(True)}
+
+# Characters read at a time from files by pcfor_many().
+READ_SIZE = 65536
+
+
+def text_records(source, delimiter):
+    """
+    Utility function. Generates the records in 'source' (a string, or a file
+    object to be read a block at a time) separated by 'delimiter'. A final
+    empty record, after a trailing delimiter, is dropped.
+    """
+    if hasattr(source, 'read'):
+        blocks = file_blocks(source)
+    else:
+        blocks = [source]
+    carry = ''
+    for block in blocks:
+        records = (carry + block).split(delimiter)
+        carry = records.pop()
+        for record in records:
+            yield record
+    if carry:
+        yield carry
+
+
+def file_blocks(source):
+    while True:
+        block = source.read(READ_SIZE)
+        if not block:
+            return
+        yield block
+
+
+def pcfor_many(source, delimiter='\n', doubles=False, octaves=False,
+               masks=False, errors=None):
+    """
+    Translates a whole stream of note lists at once. 'source' is a string
+    or a text file object; it holds one record per line (or per
+    'delimiter'), and each record is a space-separated string of notes
+    just like the input to pcfor(). The result is a generator, so even
+    very large files are read lazily, one block at a time.
+
+    For every record, it generates the PcSet pcfor() would return -- or,
+    if 'masks' is True, the binary value of that set as an integer (see
+    pcsets.pcset.binaryvalue), ready to collect with array('H', ...).
+
+    The note names are looked up in a precompiled table (see note_table)
+    and a few more spellings can be allowed than pcfor() accepts:
+
+        * 'doubles' = True allows double flats and double sharps, such as
+          'Bbb', 'F##', 'Fx', or the unicode double flat and sharp signs.
+
+        * 'octaves' = True allows an octave number after each note, as in
+          'C#4' or 'Bb-1'. The octave is ignored.
+
+    A record with a bad note doesn't stop the stream. None is generated in
+    its place, and if 'errors' is a list, the tuple (record, position,
+    note) is appended to it: the index of the record, the index of the bad
+    note within the record, and the note itself, all counting from 0.
+    """
+    table = NOTE_TABLES[bool(doubles)]
+    for record, text in enumerate(text_records(source, delimiter)):
+        pcs = []
+        for position, token in enumerate(text.split()):
+            note = token
+            if octaves:
+                note = note.rstrip('0123456789')
+                if note.endswith('-'):
+                    note = note[:-1]
+            try:
+                pcs.append(table[note])
+            except KeyError:
+                if errors is not None:
+                    errors.append((record, position, token))
+                pcs = None
+                break
+        if pcs is None:
+            yield None
+        elif masks:
+            value = 0
+            for pc in pcs:
+                value |= 1 << pc
+            yield value
+        else:
+            yield PcSet(pcs)
 
 
 def flat(pc):
@@ -319,9 +468,57 @@ def eliminate(items, based_on=None):
     return winners_circle
 
 
-def minconflict(pcs):
+def spellings(pcs):
     """
     Utility function. Generates every possible permutation for sharp and flat
+    note names for the 'black key' notes in pcs, and returns them as a list of
+    strings. There are 2**k of them for k black keys; minconflict() finds the
+    best one without listing them all.
+    """
+    options = [[]]  # seed for an expandable list of lists
+    for pc in pcs:
+        if CSCALE[pc] != '-':
+            # natural note
+            [s.append(CSCALE[pc]) for s in options]
+        else:
+            # accidental, list doubles in size.
+            build = []
+            for choice in flat(pc), sharp(pc):
+                # deep copy
+                wcopy = [list(s) for s in options]
+                [s_copy.append(choice) for s_copy in wcopy]
+                build.extend(wcopy)
+            options = build
+    # Transform into a list of strings.
+    return [' '.join(notelists) for notelists in options]
+
+
+def spelling_choices(pc):
+    """
+    Utility function. The possible spellings of pc as a list of (name,
+    letter, popularity) tuples: name is the note name, letter is the index
+    of its base note in 'CDEFGAB', and popularity is its score in
+    popularitycontest. Natural notes have one choice; black keys have two,
+    flat first.
+    """
+    choices = []
+    for name in (flat(pc), sharp(pc)):
+        if choices and name == choices[0][0]:
+            break
+        choices.append((name, "CDEFGAB".index(name[0]),
+                        popularitycontest(name)))
+    return choices
+
+
+SPELLING_CHOICES = [spelling_choices(pc) for pc in range(12)]
+
+# conflict() penalty for a base note name used 0, 1, 2, or 3+ times
+CONFLICT_PENALTY = [0, 0, -1, -5]
+
+
+def minconflict(pcs):
+    """
+    Utility function. Considers every possible permutation for sharp and flat
     note names for the 'black key' notes, then decides which one leads to the
     least name conflict using an ordered series of criteria:
 
@@ -350,45 +547,165 @@ def minconflict(pcs):
 
     4. As an absolute last ditch attempt, if all else fails, the function
        sorts the remaining strings and picks the one that comes first.
+
+    The answer is the same as scoring each string from spellings(pcs) with
+    conflict, neighborconflict and popularitycontest in turn, but there are
+    2**k such strings for k black keys. Instead, the notes are spelled one
+    position at a time (dynamic programming). All that matters about the
+    notes spelled so far is how often each base name has been used (capped
+    at 3, beyond which conflict() can't get any worse) and the base name of
+    the last note; for each such state only the best spelling so far is
+    kept. Since every spelling of a given position has the same length,
+    ties in alphabetical order are settled by ranking the kept spellings at
+    each position. This also works for long ordered sequences, such as
+    whole melodies, where repeated pitch classes are allowed.
     """
-    # permutations
-    options = [[]]  # seed for an expandable list of lists
+    # state -> (neighbor score, popularity, rank, ties)
+    # where state = (base name counts, last base name)
+    layer = {((0,) * 7, None): (0, 0, 0, 1)}
+    history = []
     for pc in pcs:
-        if CSCALE[pc] != '-':
-            # natural note
-            [s.append(CSCALE[pc]) for s in options]
-        else:
-            # accidental, list doubles in size.
-            build = []
-            for choice in flat(pc), sharp(pc):
-                # deep copy
-                wcopy = [list(s) for s in options]
-                [s_copy.append(choice) for s_copy in wcopy]
-                build.extend(wcopy)
-            options = build
-    # Transform into a list of strings.
-    options = [' '.join(notelists) for notelists in options]
-    # RANKING: a single item should bypass all remaining tests.
-    # Tests will be popped from the end in order.
-    ranking_functions = [
-        popularitycontest,  # least important
-        neighborconflict,
-        conflict            # most important
-        ]
-    while len(options) > 1:
-        try:
-            contest = ranking_functions.pop()
-        except IndexError:
-            # no more tests!
-            break
-        options = eliminate(options, based_on=contest)
-    if len(options) > 1:
+        candidates = {}
+        for state, (neighbors, popularity, rank, ties) in layer.items():
+            counts, last = state
+            for name, letter, score in SPELLING_CHOICES[pc]:
+                used = counts
+                if used[letter] < 3:
+                    used = used[:letter] + (used[letter] + 1,) + \
+                        used[letter + 1:]
+                successor = (used, letter)
+                grade = (neighbors - (letter == last), popularity + score)
+                order = (rank, name)
+                best = candidates.get(successor)
+                if best is None or grade > best[0]:
+                    candidates[successor] = (grade, order, state, ties, name)
+                elif grade == best[0]:
+                    # equally good; keep the first alphabetically
+                    if order < best[1]:
+                        best = (grade, order, state, best[3], name)
+                    candidates[successor] = best[:3] + (best[3] + ties,
+                                                        best[4])
+        # rank the spellings kept so far, in alphabetical order
+        ordered = sorted(candidates, key=lambda s: candidates[s][1])
+        layer = {}
+        steps = {}
+        for rank, state in enumerate(ordered):
+            grade, order, previous, ties, name = candidates[state]
+            layer[state] = grade + (rank, ties)
+            steps[state] = (previous, name)
+        history.append(steps)
+    # final scores
+    winner = None
+    for state, (neighbors, popularity, rank, ties) in layer.items():
+        conflicts = sum([CONFLICT_PENALTY[c] for c in state[0]])
+        grade = (conflicts, neighbors, popularity)
+        if winner is None or grade > winner[0]:
+            winner = (grade, rank, state, ties)
+        elif grade == winner[0]:
+            if rank < winner[1]:
+                winner = (grade, rank, state, winner[3])
+            winner = winner[:3] + (winner[3] + ties,)
+    if winner[3] > 1 and PERFECTION_TESTING:
         # algorithm perfection testing (optional)
-        if PERFECTION_TESTING:
-            raise PerfectionTestingFailure(pcs, options)
-        # alphabetical order ;-) ...the last resort.
-        options.sort()
-    return options[0]
+        options = spellings(pcs)
+        for contest in conflict, neighborconflict, popularitycontest:
+            options = eliminate(options, based_on=contest)
+        raise PerfectionTestingFailure(pcs, options)
+    names = []
+    state = winner[2]
+    for steps in reversed(history):
+        state, name = steps[state]
+        names.append(name)
+    names.reverse()
+    return ' '.join(names)
+
+
+class SpellingCache:
+
+    """
+    A bounded, thread-safe memo of minimum conflict spellings. The spelling
+    chosen by minconflict() depends only on the ordered pitch classes, so
+    the result for each ordered tuple is kept, up to 'maxsize' of them; the
+    least recently used entries are forgotten first.
+
+    For applications that spell a great many different sets, precompute()
+    additionally spells every possible set in ascending order once (all
+    4096 of them) and keeps the results in a table that is never evicted.
+
+    The module creates one SpellingCache, SPELLINGS, which notes() uses.
+    Its statistics are available through SPELLINGS.info().
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.lock = Lock()
+        self.clear()
+
+    def clear(self):
+        """
+        Forgets every cached spelling (including any precomputed table) and
+        resets the statistics.
+        """
+        with self.lock:
+            self.entries = OrderedDict()
+            self.table = None
+            self.hits = 0
+            self.misses = 0
+
+    def precompute(self):
+        """
+        Spells all 4096 sets in ascending order and keeps the results
+        permanently. Sorted input is then always answered from this table.
+        """
+        table = {}
+        for value in range(4096):
+            key = tuple(binarylist(value))
+            table[key] = minconflict(key)
+        with self.lock:
+            self.table = table
+
+    def spell(self, pcs):
+        """
+        Returns minconflict(pcs), from the cache if possible.
+        """
+        key = tuple(pcs)
+        with self.lock:
+            if self.table is not None and key in self.table:
+                self.hits += 1
+                return self.table[key]
+            try:
+                result = self.entries.pop(key)
+            except KeyError:
+                self.misses += 1
+            else:
+                # hit; move to the most recently used end
+                self.entries[key] = result
+                self.hits += 1
+                return result
+        result = minconflict(key)
+        with self.lock:
+            self.entries[key] = result
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return result
+
+    def info(self):
+        """
+        Returns the cache statistics as a dictionary: 'hits', 'misses',
+        'size' (entries currently cached), 'maxsize', and 'table' (the
+        number of precomputed spellings, or 0).
+        """
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self.entries),
+                'maxsize': self.maxsize,
+                'table': len(self.table or ()),
+                }
+
+
+SPELLINGS = SpellingCache()
 
 
 def notes(pcslist, pref=None, unicode=False):
@@ -412,7 +729,17 @@ def notes(pcslist, pref=None, unicode=False):
         Sharps are chosen.  The 'black key' notes are always C#, D#, F#, G#,
         and A#
 
-    *   ``pref = (anything else)``: UNDEFINED. Who knows what the future holds?
+    *   ``pref = <key>``: key signature setting. *pref* names a major key
+        ('Eb', 'F#') or a minor key ('Cm', 'G#m'), with up to seven sharps
+        or flats. Notes of the key are named as its signature says, so F#
+        major has E#, and Gb major has Cb. Other notes are named as notes
+        of the key raised or lowered a half step -- with sharps in sharp
+        keys and flats in flat keys (see key_spelling).
+
+    *   ``pref = (anything else)``: 'minimum conflict' setting, the same as
+        None -- so '' or False, say, change nothing. To check that a key
+        name is valid before using it, call key_fifths(pref), which raises
+        UnknownKeyError if it isn't.
 
     If the *unicode* parameter is set to ``True`` or *pref* is either UFLAT or
     USHARP, the returned string will be unicode as well, using the correct
@@ -424,23 +751,348 @@ def notes(pcslist, pref=None, unicode=False):
     For example, 'A# B C Db' would be chosen over 'Bb B C Db', 'A# B C C#', or
     (worst of all) 'Bb B C C#'. This applies only to the 'black key' notes --
     natural-named notes always appear as themselves.
+
+    Minimum conflict spellings are remembered by the module's SpellingCache,
+    SPELLINGS; see its documentation for tuning and statistics.
     """
     # gatekeeper
     pcs = PcSet(pcslist)
-    # accidental preference
-    if pref == 'b' or pref == UFLAT:
-        stringform = ' '.join(flat(pc) for pc in pcs)
-    elif pref == '#' or pref == USHARP:
-        stringform = ' '.join(sharp(pc) for pc in pcs)
-    else:
-        stringform = minconflict(pcs)
+    # accidental preference or key
+    names = note_names(pref, unicode)
+    if names is not None:
+        return ' '.join([names[pc] for pc in pcs])
+    stringform = SPELLINGS.spell(pcs)
     # final formatting
-    if unicode or pref in (UFLAT, USHARP):
+    if unicode:
         stringform = stringform.replace('b', UFLAT)
         stringform = stringform.replace('#', USHARP)
     return stringform
 
 
+# Note names for each pitch class, by accidental preference and unicode.
+NOTE_NAMES = {
+    ('b', False): [flat(pc) for pc in range(12)],
+    ('#', False): [sharp(pc) for pc in range(12)],
+    ('b', True): [flat(pc).replace('b', UFLAT) for pc in range(12)],
+    ('#', True): [sharp(pc).replace('#', USHARP) for pc in range(12)],
+    }
+
+# The letters in order of fifths, with their natural pitch classes.
+FIFTHS = [('F', 5), ('C', 0), ('G', 7), ('D', 2), ('A', 9), ('E', 4),
+          ('B', 11)]
+
+ACCIDENTALS = {-1: 'b', 0: '', 1: '#'}
+
+
+def key_fifths(key):
+    """
+    Utility function. Returns (fifths, minor) for the name of a key: the
+    number of sharps in its signature (negative for flats), and whether it
+    is a minor key. Raises UnknownKeyError if 'key' isn't a key name.
+    """
+    try:
+        name = key.replace(UFLAT, 'b').replace(USHARP, '#')
+    except AttributeError:
+        raise UnknownKeyError(key)
+    minor = name.endswith('m')
+    if minor:
+        name = name[:-1]
+    letters = [letter for letter, natural in FIFTHS]
+    if not 1 <= len(name) <= 2 or name[0] not in letters or \
+            name[1:] not in ('', 'b', '#'):
+        raise UnknownKeyError(key)
+    fifths = letters.index(name[0]) - 1 + 7 * name.count('#') \
+        - 7 * name.count('b') - 3 * minor
+    if not -7 <= fifths <= 7:
+        raise UnknownKeyError(key)
+    return fifths, minor
+
+
+def key_spelling(fifths, minor=False):
+    """
+    Utility function. Returns the names of the 12 pitch classes in the key
+    with 'fifths' sharps (or -fifths flats), as written in that key.
+
+    The notes of the key are named as its signature says. Every other pitch
+    class is named as a note of the key raised or lowered a half step,
+    choosing the name with the fewest accidentals, then sharps in sharp
+    keys and flats in flat keys. With no sharps or flats, the most popular
+    name is chosen (see RANKING). In minor keys, the raised sixth and
+    seventh degrees of the melodic minor are written as such -- except
+    where that would take a double sharp, which pcfor() could not read
+    back: in G#, D# and A# minor those degrees get the ordinary chromatic
+    name instead (G rather than F## in G# minor, for instance).
+    """
+    names = [None] * 12
+    options = [[] for pc in range(12)]
+    for position, (letter, natural) in enumerate(FIFTHS):
+        # how this letter is altered by the key signature
+        signature = (fifths - position + 6) // 7
+        names[(natural + signature) % 12] = letter + ACCIDENTALS[signature]
+        for alteration in (signature - 1, signature + 1):
+            if alteration in ACCIDENTALS:
+                note = letter + ACCIDENTALS[alteration]
+                options[(natural + alteration) % 12].append(note)
+    if minor:
+        tonic = (7 * fifths + 9) % 12
+        for degree in (9, 11):
+            pc = (tonic + degree) % 12
+            below = names[(pc - 1) % 12]
+            if names[pc] is None and '#' not in below:
+                names[pc] = below[0] if 'b' in below else below + '#'
+    for pc in range(12):
+        if names[pc] is None:
+            names[pc] = min(options[pc], key=lambda note:
+                            (len(note), preference(note, fifths)))
+    return names
+
+
+def preference(note, fifths):
+    if fifths > 0:
+        return '#' not in note
+    if fifths < 0:
+        return 'b' not in note
+    return -RANKING.index(note) if note in RANKING else 0
+
+
+def key_names(fifths):
+    """
+    Utility function. Returns the names of the major and minor keys with
+    'fifths' sharps (or -fifths flats).
+    """
+    names = []
+    for offset, suffix in ((0, ''), (3, 'm')):
+        position = fifths + offset + 1
+        letter, natural = FIFTHS[position % 7]
+        names.append(letter + ACCIDENTALS[position // 7] + suffix)
+    return names
+
+
+# Note names for each pitch class in every key, by key name and unicode.
+KEY_SPELLINGS = {}
+for fifths in range(-7, 8):
+    for key, minor in zip(key_names(fifths), (False, True)):
+        spelling = key_spelling(fifths, minor)
+        KEY_SPELLINGS[key, False] = spelling
+        KEY_SPELLINGS[key, True] = [note.replace('b', UFLAT).replace(
+            '#', USHARP) for note in spelling]
+
+
+def note_names(pref, unicode=False):
+    """
+    Utility function. Returns the list of 12 note names that 'pref' and
+    'unicode' call for in notes(), or None for minimum conflict spelling --
+    which is what any 'pref' that isn't a sign or a key name calls for.
+    """
+    if not pref:
+        return None
+    if pref == 'b' or pref == UFLAT:
+        return NOTE_NAMES['b', bool(unicode) or pref == UFLAT]
+    if pref == '#' or pref == USHARP:
+        return NOTE_NAMES['#', bool(unicode) or pref == USHARP]
+    try:
+        fifths, minor = key_fifths(pref)
+    except UnknownKeyError:
+        return None
+    key = key_names(fifths)[minor]
+    return KEY_SPELLINGS[key, bool(unicode) or UFLAT in pref
+                         or USHARP in pref]
+
+
+# Most minimum conflict spellings notes_many() remembers by itself, on top
+# of the shared SPELLINGS cache.
+BATCH_MEMORY = 65536
+
+
+def notes_many(sets, pref=None, unicode=False):
+    """
+    Generates notes(pcs, pref, unicode) for every pcs in the iterable
+    'sets', one string at a time, so that even very long streams of sets
+    can be rendered without holding them all in memory.
+
+    The options are worked out once for the whole stream rather than once
+    per set; flat, sharp and key signature names come straight from
+    precomputed tables (NOTE_NAMES and KEY_SPELLINGS), and minimum
+    conflict spellings are looked up in the
+    module's SpellingCache (SPELLINGS) and remembered for the rest of the
+    stream. PcSets are used as they are; anything else is checked by
+    PcSet(), just as notes() does.
+    """
+    names = note_names(pref, unicode)
+    spelled = {}
+    for pcslist in sets:
+        if not isinstance(pcslist, PcSet):
+            pcslist = PcSet(pcslist)
+        pcs = tuple(pcslist)
+        if names is not None:
+            yield ' '.join([names[pc] for pc in pcs])
+            continue
+        try:
+            yield spelled[pcs]
+        except KeyError:
+            stringform = SPELLINGS.spell(pcs)
+            if unicode:
+                stringform = stringform.replace('b', UFLAT)
+                stringform = stringform.replace('#', USHARP)
+            if len(spelled) >= BATCH_MEMORY:
+                spelled.clear()
+            spelled[pcs] = stringform
+            yield stringform
+
+
+# Note strings for all 4096 binary values, by note names (or None for
+# minimum conflict) and unicode; filled in by value_notes() when needed.
+VALUE_NOTES = {}
+
+
+def value_notes(values, pref=None, unicode=False):
+    """
+    Generates notes(binarylist(value), pref, unicode) for every binary value
+    in 'values' (see pcsets.pcset.binaryvalue) -- such as an array('H') of
+    them. The notes are in ascending order of pitch class.
+
+    The strings for all 4096 values are worked out once for each setting of
+    pref and unicode, the first time it is used, so after that every value
+    is a single table lookup.
+    """
+    names = note_names(pref, unicode)
+    setting = (None if names is None else tuple(names), bool(unicode))
+    try:
+        table = VALUE_NOTES[setting]
+    except KeyError:
+        table = list(notes_many([binarylist(value) for value in range(4096)],
+                                pref, unicode))
+        VALUE_NOTES[setting] = table
+    for value in values:
+        yield table[value]
+
+
+def write_notes(sets, sink, pref=None, unicode=False, end='\n'):
+    """
+    Renders every pcs in 'sets' as in notes_many() and writes the strings
+    to the text file (or any object with a write method) 'sink', each one
+    followed by 'end'. Output is written in blocks, not line by line.
+    Returns the number of sets written.
+    """
+    count = 0
+    block = []
+    for stringform in notes_many(sets, pref, unicode):
+        block.append(stringform)
+        if len(block) == 1024:
+            sink.write(end.join(block) + end)
+            count += len(block)
+            block = []
+    if block:
+        sink.write(end.join(block) + end)
+        count += len(block)
+    return count
+
+
+def progression_options(pcs):
+    """
+    Utility function. Returns every spelling of pcs as a tuple (string,
+    grade, sharps), where grade is the minimum conflict score (conflict,
+    neighborconflict, popularitycontest) of the string and sharps is the
+    binary value (see pcsets.pcset.binaryvalue) of the black keys spelled
+    as sharps.
+    """
+    options = []
+    for combination in product(*[SPELLING_CHOICES[pc] for pc in pcs]):
+        string = ' '.join([choice[0] for choice in combination])
+        sharps = 0
+        for pc, choice in zip(pcs, combination):
+            if choice[0].endswith('#'):
+                sharps |= 1 << pc
+        grade = (conflict(string), neighborconflict(string),
+                 popularitycontest(string))
+        options.append((string, grade, sharps))
+    return options
+
+
+def respellings(a, b):
+    # number of set bits in a ^ b: pitch classes spelled differently
+    return bin(a ^ b).count('1')
+
+
+def notes_progression(progression, unicode=False):
+    """
+    Spells a whole progression -- a list of PcSets, or of anything notes()
+    accepts -- and returns the list of note strings. Spelling each set on
+    its own with notes() can flip a pitch class between F# and Gb from one
+    chord to the next; this function chooses the spellings for the whole
+    sequence together.
+
+    Each chord is scored just as in the 'minimum conflict' setting of
+    notes(), with one more criterion, consistency: every pitch class shared
+    by two neighboring chords but spelled differently in them counts
+    against the progression. Scores are compared in this order:
+
+        1. name conflicts within each chord,
+        2. spelling changes between neighboring chords,
+        3. neighbor conflicts within each chord,
+        4. popularity,
+        5. and, as a last resort, alphabetical order, chord by chord.
+
+    Each criterion is added up over the whole progression. A single chord
+    is spelled exactly as notes() would spell it.
+
+    The search is a Viterbi-style dynamic program: for every possible
+    spelling of each chord, only the best way of spelling the progression
+    up to that chord is kept, so the time taken grows linearly with the
+    length of the progression.
+    """
+    layers = []
+    scores = None
+    previous = None
+    for pcslist in progression:
+        pcs = list(PcSet(pcslist))
+        present = binaryvalue(pcs)
+        options = progression_options(pcs)
+        candidates = []
+        for string, grade, sharps in options:
+            if scores is None:
+                best, back = (0, 0, 0, 0), None
+            else:
+                shared = present & previous
+                best = back = None
+                for k, (score, rank, earlier) in enumerate(scores):
+                    change = respellings(sharps & shared, earlier & shared)
+                    total = (score[0], score[1] - change, score[2], score[3])
+                    if best is None or total > best or \
+                            (total == best and rank < scores[back][1]):
+                        best, back = total, k
+            total = (best[0] + grade[0], best[1], best[2] + grade[1],
+                     best[3] + grade[2])
+            if back is None:
+                order = (0, string)
+            else:
+                order = (scores[back][1], string)
+            candidates.append((total, order, sharps, back, string))
+        # rank the progressions kept so far, in alphabetical order
+        ordering = sorted(range(len(candidates)),
+                          key=lambda j: candidates[j][1])
+        ranks = [0] * len(candidates)
+        for rank, j in enumerate(ordering):
+            ranks[j] = rank
+        scores = [(c[0], ranks[j], c[2]) for j, c in enumerate(candidates)]
+        layers.append([(c[3], c[4]) for c in candidates])
+        previous = present
+    if not layers:
+        return []
+    winner = min(range(len(scores)),
+                 key=lambda j: (tuple(-x for x in scores[j][0]),
+                                scores[j][1]))
+    spelled = []
+    for layer in reversed(layers):
+        winner, string = layer[winner]
+        spelled.append(string)
+    spelled.reverse()
+    if unicode:
+        spelled = [s.replace('b', UFLAT).replace('#', USHARP)
+                   for s in spelled]
+    return spelled
+
+
 if __name__ == '__main__':
     print("\nDifferent interpretations of the chromatic scale:\n")
     print("\t>>> from pcsets.pcset import PcSet")
@@ -157,6 +157,37 @@ def binaryvalue(i):
     return value
 
 
+def binarylist(value):
+    """
+    A utility function. The inverse of binaryvalue: returns the sorted list
+    of integers whose bits are set in 'value'. binarylist(131) is [0, 1, 7].
+    """
+    return [bit for bit in range(12) if value & (1 << bit)]
+
+
+def transposevalue(value, n):
+    """
+    A utility function. Transposes a binary 'index value' (see binaryvalue)
+    by n. Transposition of a set is just a rotation of its twelve bits, so
+    this is the same as binaryvalue(PcSet(binarylist(value)).T(n)) without
+    building any PcSets along the way.
+    """
+    n %= 12
+    return ((value << n) | (value >> (12 - n))) & 4095
+
+
+def invertvalue(value):
+    """
+    A utility function. Inverts a binary 'index value' (see binaryvalue):
+    bit x moves to bit (12 - x) % 12, just as I() maps pitch class x.
+    """
+    inverse = value & 1
+    for bit in range(1, 12):
+        if value & (1 << bit):
+            inverse |= 1 << (12 - bit)
+    return inverse
+
+
 class PcSet:
 
     """
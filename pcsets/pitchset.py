@@ -0,0 +1,323 @@
+#!/usr/bin/env python
+
+# pcsets 2.0.2 -- Pitch Class Sets for Python.
+#
+# Copyright 2007 Bruce H. McCosar
+#
+# This file is part of the package 'pcsets'
+#
+# The package 'pcsets' is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3 of
+# the License, or (at your option) any later version.
+#
+# The package 'pcsets' is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+pitchset.py -- sets of pitches
+
+A PcSet forgets which octave each note is in. A PitchSet remembers: it holds
+actual pitches, numbered as MIDI note numbers (middle C, 'C4', is 60), so it
+can describe a particular voicing of a chord -- and then hand its pitch
+classes on to everything else in pcsets.
+
+    pitchfor(s)       : the PitchSet for a string of pitch names with
+                        octaves, such as 'C3 G3 E4 Bb4'.
+
+    PitchSet(pitches) : the PitchSet for a list of MIDI note numbers.
+
+    values_of(sets)   : the binary values (see pcsets.pcset.binaryvalue)
+                        of the pitch classes of many pitch lists at once.
+
+Example: a close and an open voicing of the same chord.
+
+    >>> from pcsets.pitchset import *
+    >>> close = pitchfor('C4 E4 G4')
+    >>> wide = PitchSet([48, 67, 76])
+    >>> print close.pcs(), wide.pcs(), close.span(), wide.span()
+    047 074 7 28
+    >>> print wide.names()
+    C3 G4 E5
+
+
+EXPERIMENTAL MODULE -- interface may change.
+"""
+
+from __future__ import print_function
+
+__metaclass__ = type
+
+__all__ = """
+PitchSet
+PitchNameError
+pitchfor
+values_of
+""".split()
+
+from array import array
+
+from .pcset import PcSet
+from .noteops import TranslationError, NonStringError, NOTE_TABLES
+from .noteops import CSCALE, notes, pitchclass_of
+
+# Pitch classes and bits of the pitches in the MIDI range are looked up
+# rather than computed; pitches outside it are allowed, but slower.
+MIDI_RANGE = 128
+PC_OF = array('B', [pitch % 12 for pitch in range(MIDI_RANGE)])
+BIT_OF = [1 << (pitch % 12) for pitch in range(MIDI_RANGE)]
+
+
+class PitchNameError(TranslationError):
+    """
+    Pitches must be written as a note name followed by an octave number,
+    such as 'C#4' or 'Bb-1' (middle C is C4), or as a MIDI note number.
+    The problem found was: %(problem)r
+    """
+    def __init__(self, s):
+        self.message = self.__doc__ % {'problem': s}
+
+
+def pitch_offsets():
+    """
+    Utility function. Returns a dictionary from every note name (including
+    double flats and sharps) to its distance in half steps from the C of
+    its own octave -- so Cb is -1 and B# is 12.
+    """
+    offsets = {}
+    for name, pc in NOTE_TABLES[True].items():
+        natural = CSCALE.index(name[0])
+        offsets[name] = natural + (pc - natural + 6) % 12 - 6
+    return offsets
+
+
+PITCH_OFFSETS = pitch_offsets()
+
+
+def pitch_of(name):
+    """
+    A utility function that translates a pitch name with an octave, such as
+    'C#4', or a MIDI note number as a string, into a MIDI note number.
+    """
+    try:
+        return int(name)
+    except ValueError:
+        pass
+    note = name.rstrip('0123456789')
+    octave = name[len(note):]
+    if note.endswith('-'):
+        note = note[:-1]
+        octave = '-' + octave
+    if not octave or octave == '-':
+        raise PitchNameError(name)
+    try:
+        offset = PITCH_OFFSETS[note]
+    except KeyError:
+        # not a note; let pitchclass_of say why
+        pitchclass_of(note)
+        raise PitchNameError(name)
+    return 12 * (int(octave) + 1) + offset
+
+
+def pitchfor(spec):
+    """
+    Translates a space-separated string of pitches into a PitchSet. Each
+    pitch is a note name as pcfor() accepts it -- double flats and sharps
+    are allowed as well -- followed by an octave number, or simply a MIDI
+    note number: 'C4 Eb4 G4' and '60 63 67' are the same.
+    """
+    try:
+        names = spec.split()
+    except AttributeError:
+        raise NonStringError(spec)
+    return PitchSet([pitch_of(name) for name in names])
+
+
+def in_range(pitches):
+    return not pitches or (min(pitches) >= 0
+                           and max(pitches) < MIDI_RANGE)
+
+
+def values_of(sets):
+    """
+    Returns an array('H') holding the binary value of the pitch classes of
+    each pitch list in 'sets' (lists or arrays of MIDI note numbers, or
+    PitchSets), without building any PcSets along the way.
+    """
+    values = array('H')
+    bits = BIT_OF
+    for pitches in sets:
+        if isinstance(pitches, PitchSet):
+            values.append(pitches.value())
+            continue
+        value = 0
+        if in_range(pitches):
+            for pitch in pitches:
+                value |= bits[pitch]
+        else:
+            for pitch in pitches:
+                value |= 1 << (pitch % 12)
+        values.append(value)
+    return values
+
+
+class PitchSet:
+
+    """
+    A set of pitches, numbered as MIDI note numbers: middle C is 60, and
+    each half step adds one. Like a PcSet, a PitchSet keeps its pitches in
+    the order they were given, without duplicates. It never changes once
+    defined, so its pitch classes are worked out only once.
+
+    PITCH CLASSES
+        pcs()
+        value()
+
+    REGISTER
+        lowest()
+        highest()
+        span()
+        mean()
+        spacing()
+
+    OPERATIONS
+        transpose(n)
+        sort()
+        names(pref)
+
+    PitchSets also have string, length, iterator and containment methods.
+    """
+
+    def __init__(self, definition):
+        """
+        A PitchSet may be defined as a list (or array) of MIDI note numbers,
+        or as a string of pitches, as pitchfor() reads them.
+        """
+        if isinstance(definition, PitchSet):
+            definition = definition.pitches
+        elif isinstance(definition, str):
+            definition = [pitch_of(name) for name in definition.split()]
+        self.pitches = array('i')
+        seen = set()
+        for pitch in definition:
+            pitch = int(pitch)
+            if pitch not in seen:
+                seen.add(pitch)
+                self.pitches.append(pitch)
+        self._value = None
+        self._pcs = None
+
+    def __iter__(self):
+        return iter(self.pitches)
+
+    def __len__(self):
+        return len(self.pitches)
+
+    def __contains__(self, pitch):
+        return pitch in self.pitches
+
+    def __str__(self):
+        return ' '.join([str(pitch) for pitch in self.pitches])
+
+    def __repr__(self):
+        return 'PitchSet(%s)' % self.pitches.tolist()
+
+    # pitch classes
+
+    def value(self):
+        """
+        Returns the binary value of the set's pitch classes (see
+        pcsets.pcset.binaryvalue).
+        """
+        if self._value is None:
+            self._value = values_of([self.pitches])[0]
+        return self._value
+
+    def pcs(self):
+        """
+        Returns the PcSet of the set's pitch classes, in the order their
+        pitches appear in the set.
+        """
+        if self._pcs is None:
+            if in_range(self.pitches):
+                pcs = [PC_OF[pitch] for pitch in self.pitches]
+            else:
+                pcs = [pitch % 12 for pitch in self.pitches]
+            self._pcs = PcSet(pcs)
+        return self._pcs
+
+    # register
+
+    def lowest(self):
+        """
+        Returns the lowest pitch, or None for an empty set.
+        """
+        return min(self.pitches) if self.pitches else None
+
+    def highest(self):
+        """
+        Returns the highest pitch, or None for an empty set.
+        """
+        return max(self.pitches) if self.pitches else None
+
+    def span(self):
+        """
+        Returns the distance in half steps from the lowest pitch to the
+        highest (0 for an empty set).
+        """
+        if not self.pitches:
+            return 0
+        return max(self.pitches) - min(self.pitches)
+
+    def mean(self):
+        """
+        Returns the average pitch -- the 'center of gravity' of a voicing --
+        or None for an empty set.
+        """
+        if not self.pitches:
+            return None
+        return float(sum(self.pitches)) / len(self.pitches)
+
+    def spacing(self):
+        """
+        Returns the intervals in half steps between neighboring pitches,
+        from the bottom of the set to the top.
+        """
+        ordered = sorted(self.pitches)
+        return [b - a for a, b in zip(ordered, ordered[1:])]
+
+    # operations
+
+    def transpose(self, n):
+        """
+        Returns a new PitchSet with every pitch moved up n half steps (or
+        down, for negative n).
+        """
+        return PitchSet([pitch + n for pitch in self.pitches])
+
+    def sort(self):
+        """
+        Returns a new PitchSet with the pitches in ascending order.
+        """
+        return PitchSet(sorted(self.pitches))
+
+    def names(self, pref=None, unicode=False):
+        """
+        Returns the pitches as a string of note names with octave numbers,
+        spelled just as noteops.notes(pcs, pref, unicode) spells them. The
+        octave number always goes with the letter, so the B# just below
+        middle C is 'B#3'.
+        """
+        spelled = notes(self.pcs(), pref, unicode).split()
+        spelling = dict(zip(self.pcs(), spelled))
+        names = []
+        for pitch in self.pitches:
+            name = spelling[pitch % 12]
+            octave = (pitch - PITCH_OFFSETS[name]) // 12 - 1
+            names.append('%s%d' % (name, octave))
+        return ' '.join(names)
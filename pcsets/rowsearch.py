@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+
+# pcsets 2.0.2 -- Pitch Class Sets for Python.
+#
+# Copyright 2007 Bruce H. McCosar
+#
+# This file is part of the package 'pcsets'
+#
+# The package 'pcsets' is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3 of
+# the License, or (at your option) any later version.
+#
+# The package 'pcsets' is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+rowsearch.py -- searching for tone rows
+
+There are 12! tone rows, far too many to look through one by one for the few
+with some special property. The searches in this module build rows a note at
+a time instead, and abandon each partial row as soon as it can't possibly
+work out -- so they only ever look at a tiny fraction of the 12!.
+
+    interval_rows(...) : rows whose successive intervals (see
+                         ToneRow.contour) follow given rules; for example,
+                         every all-interval series.
+
+    segment_rows(classes)  : rows whose successive segments -- trichords,
+                             hexachords, and so on -- belong to given set
+                             classes; for example, derived rows.
+
+    segment_values(classes): just the unordered segments of such rows, as
+                             tuples of binary values (see
+                             pcsets.pcset.binaryvalue).
+
+Searches are generators: rows are produced as they are found, so the first
+ones arrive at once, and a search can be stopped at any point. Each can also
+skip rows equivalent to rows already found (see pcsets.tonerow.rowkey),
+producing just one row of each family.
+
+Example: the all-interval series starting on C.
+
+    >>> from pcsets.rowsearch import *
+    >>> series = list(interval_rows(distinct=True))
+    >>> print len(series), series[0]
+    3856 013725BA8496
+
+
+EXPERIMENTAL MODULE -- interface may change.
+"""
+
+from __future__ import print_function
+
+__metaclass__ = type
+
+__all__ = """
+interval_rows
+segment_rows
+segment_values
+""".split()
+
+from itertools import permutations, product
+
+from .pcset import PcSet, moderate, binaryvalue, binarylist
+from .catalog import orbit_of
+from .tonerow import trusted, unique_rows
+
+ALL_INTERVALS = (1 << 12) - 2
+
+
+def interval_masks(intervals):
+    """
+    Utility function. Returns a list of 11 bitmasks of the intervals allowed
+    between each pair of successive notes: 'intervals' is None (anything but
+    unisons), one collection of intervals for every position, or a list of
+    11 collections (or None), one per position.
+    """
+    if intervals is None:
+        return [ALL_INTERVALS] * 11
+    intervals = list(intervals)
+    if not intervals or not hasattr(intervals[0], '__iter__') and \
+            intervals[0] is not None:
+        intervals = [intervals] * 11
+    if len(intervals) != 11:
+        raise ValueError('a row has 11 intervals, not %d' % len(intervals))
+    masks = []
+    for allowed in intervals:
+        if allowed is None:
+            masks.append(ALL_INTERVALS)
+        else:
+            mask = 0
+            for interval in allowed:
+                mask |= 1 << (moderate(interval))
+            masks.append(mask & ALL_INTERVALS)
+    return masks
+
+
+def interval_search(start, masks, distinct):
+    """
+    Utility function. Generates every row beginning on 'start' whose
+    interval from note k to note k + 1 is in the bitmask masks[k] (and, if
+    'distinct' is True, differs from all the others), as a list of pitch
+    classes. The same list is reused; copy it before keeping it.
+    """
+    # later[k]: every interval allowed anywhere from position k on
+    later = masks[:]
+    for position in range(9, -1, -1):
+        later[position] |= later[position + 1]
+    row = [start]
+    used = 1 << start
+    taken = 0
+    stack = [options(masks[0], taken, distinct)]
+    while stack:
+        choices = stack[-1]
+        if not choices:
+            # every way on from here has been tried; go back one note
+            stack.pop()
+            if len(row) > 1:
+                pc = row.pop()
+                used &= ~(1 << pc)
+                taken &= ~(1 << ((pc - row[-1]) % 12))
+            continue
+        interval = choices.pop()
+        pc = (row[-1] + interval) % 12
+        if used & (1 << pc):
+            continue
+        if len(row) == 11:
+            row.append(pc)
+            yield row
+            row.pop()
+            continue
+        row.append(pc)
+        used |= 1 << pc
+        taken |= 1 << interval
+        position = len(row) - 1
+        if distinct and \
+                bin(later[position] & ~taken).count('1') < 12 - len(row):
+            # not enough unused intervals left for the rest of the row
+            choices = []
+        else:
+            choices = options(masks[position], taken, distinct)
+        stack.append(choices)
+
+
+def options(mask, taken, distinct):
+    """
+    Utility function. Returns the intervals in 'mask' (less those 'taken',
+    if 'distinct'), largest first, so that popping them from the end tries
+    them smallest first.
+    """
+    if distinct:
+        mask &= ~taken
+    return [interval for interval in range(11, 0, -1)
+            if mask & (1 << interval)]
+
+
+def interval_rows(first=0, intervals=None, distinct=False, unique=False,
+                  rotation=False):
+    """
+    Generates the ToneRows beginning on 'first' (or on any pitch class, if
+    'first' is None) whose successive intervals -- the first 11 numbers of
+    ToneRow.contour() -- obey these rules:
+
+        * 'intervals' limits the interval from each note to the next. It
+          may be one collection of intervals, allowed everywhere, or a list
+          of 11 collections (None meaning no limit), one for each pair of
+          notes in turn.
+
+        * 'distinct' = True allows each interval only once, so that all 11
+          intervals appear. These are the all-interval series.
+
+    Rows come out in order of their intervals, smallest first. If 'unique'
+    is True, only the first row found of each family is generated (see
+    pcsets.tonerow.unique_rows; 'rotation' = True treats rotations of a row
+    as one family too). With 'first' = None, that needs only the rows
+    beginning on 0, so no others are searched.
+    """
+    masks = interval_masks(intervals)
+    if first is None and unique:
+        # every family has a member beginning on 0 (transposing a row
+        # keeps its intervals), and those rows come first anyway
+        starts = [0]
+    elif first is None:
+        starts = range(12)
+    else:
+        starts = [moderate(first)]
+    found = (trusted(bytes(bytearray(row)))
+             for start in starts
+             for row in interval_search(start, masks, distinct))
+    if unique:
+        found = unique_rows(found, rotation)
+    return found
+
+
+def segment_members(classes):
+    """
+    Utility function. Returns, for each segment described by 'classes', the
+    binary values of every set it may hold, smallest first: the members of
+    a set class, or every set of n notes for a number n.
+    """
+    members = []
+    for segment in classes:
+        if isinstance(segment, int):
+            if not 0 < segment <= 12:
+                raise ValueError('a segment of %d notes' % segment)
+            values = [value for value in range(1 << 12)
+                      if bin(value).count('1') == segment]
+        else:
+            value = binaryvalue(PcSet(segment))
+            if not value:
+                raise ValueError('an empty segment')
+            values = sorted([member for member, operation, n
+                             in orbit_of(value)])
+        members.append(values)
+    total = sum([bin(values[0]).count('1') for values in members])
+    if total != 12:
+        raise ValueError('the segments hold %d notes, not 12' % total)
+    return members
+
+
+def fitting(members, position, used):
+    """
+    Utility function. Returns the sets that segment 'position' may hold,
+    given the pitch classes 'used' by the segments before it, largest first
+    (for popping). Returns none at all if some later segment could no
+    longer be filled, or -- for the last segment -- if what is left is not
+    one of its sets.
+    """
+    if position == len(members) - 1:
+        rest = 0xFFF & ~used
+        return [rest] if rest in members[position] else []
+    for later in members[position + 1:]:
+        for value in later:
+            if not value & used:
+                break
+        else:
+            return []
+    return [value for value in reversed(members[position])
+            if not value & used]
+
+
+def segment_search(members, first):
+    """
+    Utility function. Generates every way of dividing the 12 pitch classes
+    among the segments, one set from each list in 'members', as a tuple of
+    binary values; if 'first' is not None, the first segment must hold it.
+    """
+    stack = [fitting(members, 0, 0)]
+    if first is not None:
+        stack[0] = [value for value in stack[0] if value & (1 << first)]
+    chosen = []
+    used = 0
+    last = len(members) - 1
+    while stack:
+        choices = stack[-1]
+        if not choices:
+            stack.pop()
+            if chosen:
+                used &= ~chosen.pop()
+            continue
+        value = choices.pop()
+        if len(chosen) == last:
+            yield tuple(chosen) + (value,)
+            continue
+        chosen.append(value)
+        used |= value
+        stack.append(fitting(members, len(chosen), used))
+
+
+def segment_values(classes, first=None):
+    """
+    Generates the unordered segments of the rows segment_rows(classes)
+    would find, as tuples of binary values, one per segment: each tuple
+    divides the 12 pitch classes among the segments. If 'first' is given,
+    the first segment holds that pitch class. Every tuple stands for all
+    the orderings of its segments, so this is much faster than listing
+    the rows themselves.
+    """
+    members = segment_members(classes)
+    if first is not None:
+        first = moderate(first)
+    return segment_search(members, first)
+
+
+def segment_rows(classes, first=0, unique=False, rotation=False):
+    """
+    Generates the ToneRows beginning on 'first' (or on any pitch class, if
+    'first' is None) whose successive segments belong to 'classes'. Each
+    entry of 'classes' is a set class, given as any member (a PcSet, or
+    anything PcSet() accepts), or a number n for a segment of n notes that
+    may hold anything. The segments must add up to 12 notes, so
+
+        segment_rows(['014'] * 4)
+
+    finds the rows built of four 014 trichords, and segment_rows(['0257',
+    8]) those beginning with a 0257 tetrachord.
+
+    Rather than trying rows, the search chooses a member of each class in
+    turn, skipping any that shares a pitch class with the segments already
+    chosen, and giving up on a choice as soon as some later segment has no
+    member left to fit. Only then are the notes of each segment put in
+    every order. See interval_rows for 'unique' and 'rotation'.
+    """
+    members = segment_members(classes)
+    if first is not None:
+        first = moderate(first)
+    found = (trusted(bytes(bytearray(row)))
+             for values in segment_search(members, first)
+             for row in segment_orders(values, first))
+    if unique:
+        found = unique_rows(found, rotation)
+    return found
+
+
+def segment_orders(values, first):
+    """
+    Utility function. Generates every row (as a tuple of pitch classes)
+    made by putting the notes of each segment in 'values' in every order;
+    if 'first' is not None, the row must begin with it.
+    """
+    orders = [permutations(binarylist(value)) for value in values]
+    if first is not None:
+        rest = [pc for pc in binarylist(values[0]) if pc != first]
+        orders[0] = [(first,) + order for order in permutations(rest)]
+    for parts in product(*orders):
+        yield sum(parts, ())
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+
+# pcsets 2.0.2 -- Pitch Class Sets for Python.
+#
+# Copyright 2007 Bruce H. McCosar
+#
+# This file is part of the package 'pcsets'
+#
+# The package 'pcsets' is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3 of
+# the License, or (at your option) any later version.
+#
+# The package 'pcsets' is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+segments.py -- set classes of the segments of rows and melodies
+
+Segmentation studies ask, for every run of w successive notes of a row or a
+melody, which set class those notes belong to. Slicing out each run as a
+new PcSet and finding its prime works, but makes a great many objects. The
+functions here slide a window along the notes instead, adding the note that
+enters the window and dropping the one that leaves, and look each window's
+set up in the tables of a SetCatalog (see SetCatalog.class_table).
+
+    sliding_classes(notes, widths) : generates (start, width, index, name,
+                                     ivec) for every window.
+
+    sliding_arrays(notes, widths)  : the binary values and set class
+                                     indexes of every window, as arrays.
+
+    window_values(notes, widths)   : generates (start, width, value) for
+                                     every window, with no lookups.
+
+    class_tables(catalog)          : the lookup tables themselves.
+
+The notes may be pitch classes, pitches (taken mod 12), the characters of a
+set specification such as '0146', or a ToneRow. Repeated notes are fine: a
+window holds a pitch class as long as any of its notes is that pitch class.
+'widths' is one window width or several, all of them done in one pass; with
+cyclic=True the windows wrap around from the last note to the first, as is
+usual for rows. A set class is named by its prime (e.g. '037'), and indexed
+by its position in the catalog (see SetCatalog.class_index).
+
+Example: every trichord of the row of Webern's Op. 24, which is built of
+four 014 trichords (at 0, 3, 6 and 9).
+
+    >>> from pcsets.segments import *
+    >>> for start, width, index, name, ivec in \\
+    ...         sliding_classes('BA2376845019', 3):
+    ...     print start, name,
+    ...
+    0 014 1 015 2 015 3 014 4 012 5 024 6 014 7 015 8 015 9 014
+
+
+EXPERIMENTAL MODULE -- interface may change.
+"""
+
+from __future__ import print_function
+
+__metaclass__ = type
+
+__all__ = """
+class_tables
+sliding_arrays
+sliding_classes
+window_values
+""".split()
+
+from array import array
+
+from .pcset import moderate
+from .catalog import SetCatalog
+
+# tables for the default catalog, made the first time they are needed
+TABLES = None
+
+
+def class_tables(catalog=None):
+    """
+    Returns three tables describing the set classes of 'catalog' (a 12-tone
+    SetCatalog; by default, one shared by this module): the class index of
+    every binary value, as an array (see SetCatalog.class_table); the name
+    of each class, its prime as a string such as '037'; and the interval
+    vector of each class, as a tuple. The last two are lists, in class
+    index order.
+    """
+    global TABLES
+    if catalog is None:
+        if TABLES is None:
+            TABLES = class_tables(SetCatalog(store=False))
+        return TABLES
+    table = catalog.class_table()
+    primes = list(catalog)
+    names = [str(prime) for prime in primes]
+    ivecs = [tuple(catalog.ivec(prime)) for prime in primes]
+    return table, names, ivecs
+
+
+def window_widths(widths, length, cyclic):
+    """
+    Utility function. Returns 'widths' (one width or several) as a list,
+    checking that each is at least one note, and, for cyclic windows, at
+    most 'length' notes.
+    """
+    if isinstance(widths, int):
+        widths = [widths]
+    widths = list(widths)
+    if not widths:
+        raise ValueError('no window widths')
+    for width in widths:
+        if width < 1:
+            raise ValueError('a window of %d notes' % width)
+        if cyclic and width > length:
+            raise ValueError('a cyclic window of %d notes in %d' %
+                             (width, length))
+    return widths
+
+
+def window_values(notes, widths, cyclic=False):
+    """
+    Generates (start, width, value) for every window of each of 'widths'
+    successive notes: 'start' is the position of its first note, and
+    'value' the binary value of its pitch classes (see
+    pcsets.pcset.binaryvalue). Windows come in the order of their last
+    note, and windows ending on the same note in the order of 'widths'.
+    Without 'cyclic', a width longer than the notes has no windows.
+    """
+    pcs = [moderate(note) for note in notes]
+    length = len(pcs)
+    widths = window_widths(widths, length, cyclic)
+    # counts[k][pc]: how many notes of window k are pitch class pc
+    counts = [[0] * 12 for width in widths]
+    masks = [0] * len(widths)
+    stop = length
+    if cyclic:
+        stop += max(widths) - 1
+    for end in range(stop):
+        pc = pcs[end % length]
+        for k, width in enumerate(widths):
+            start = end - width + 1
+            if start >= length:
+                # cyclic, and every window of this width is done
+                continue
+            count = counts[k]
+            count[pc] += 1
+            if count[pc] == 1:
+                masks[k] |= 1 << pc
+            if start > 0:
+                old = pcs[start - 1]
+                count[old] -= 1
+                if not count[old]:
+                    masks[k] &= ~(1 << old)
+            if start >= 0:
+                yield start, width, masks[k]
+
+
+def sliding_classes(notes, widths, cyclic=False, catalog=None):
+    """
+    Generates (start, width, index, name, ivec) for every window of
+    window_values(notes, widths, cyclic), in the same order: 'index' is the
+    set class of the window in 'catalog' (see class_tables), 'name' its
+    prime as a string, and 'ivec' its interval vector, as a tuple.
+    """
+    table, names, ivecs = class_tables(catalog)
+    for start, width, value in window_values(notes, widths, cyclic):
+        index = table[value]
+        yield start, width, index, names[index], ivecs[index]
+
+
+def sliding_arrays(notes, widths, cyclic=False, catalog=None):
+    """
+    Same as sliding_classes, but returns a dictionary with an entry for
+    each width: a pair of arrays, the binary values of the windows
+    (array.array of type 'H') and their set class indexes (type 'B'). Item
+    i of each array is the window starting on note i. Use class_tables to
+    turn the indexes into names and interval vectors.
+    """
+    notes = list(notes)
+    table = class_tables(catalog)[0]
+    found = {}
+    for width in window_widths(widths, len(notes), cyclic):
+        found[width] = (array('H'), array('B'))
+    for start, width, value in window_values(notes, widths, cyclic):
+        values, classes = found[width]
+        values.append(value)
+        classes.append(table[value])
+    return found
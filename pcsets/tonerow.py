@@ -86,6 +86,46 @@ it look like if you transposed it so that the first element was 3?"
     goes a bit further and transposes the first pitch to 'n' after
     the shift.
 
+    packed():
+
+    Returns the whole row packed into one integer, four bits per pitch
+    class; unpacked(packed) turns it back into a ToneRow.
+
+    rank():
+
+    Returns the position of the row among all 12! rows in lexicographic
+    order; unranked(rank) turns it back into a ToneRow.
+
+    forms(),
+    matrix(),
+    label(row):
+
+    All 48 forms of the row at once, with their labels ('P0' ... 'RI11'),
+    the familiar 12 x 12 matrix, and the label of any other row that is
+    one of the forms. All are worked out the first time they are asked
+    for, then kept with the row.
+
+    combinatorial(),
+    combinatoriality():
+
+    The forms whose first hexachord is the complement of the row's own,
+    and the transforms (P, R, I, RI) that have such forms. These come
+    from tables of all the hexachords, made once; see also
+    combinatorial_rows(rows) and ALL_COMBINATORIAL.
+
+    invariants(sizes, contiguous):
+
+    The segments of the row -- dyads to hexachords, by default, either
+    runs of successive notes or scattered -- that other forms of the row
+    hold too, as unordered sets, with those forms; see also
+    invariant_rows(rows).
+
+
+Inside, every ToneRow also keeps its pitch classes as 12 bytes (the
+attribute 'encoded'). All the forms of a row are made from these with
+precomputed translation tables, without checking them over again, so
+generating forms is cheap.
+
 
 Also provided in this package are specific tone row operations. Note that most
 of the operations in pcsets.pcops are completely useless for ToneRows. For
@@ -112,7 +152,15 @@ can be imported (or that are imported by default with * ):
 
     equivalent(a, b)
     rotequiv(a, b)
+    rowkey(a)
+    unique_rows(rows)
+    label_rows(reference, rows)
+    combinatorial_rows(rows)
+    invariant_rows(rows)
     randomrow()
+    random_rows(count)
+    unpacked(packed)
+    unranked(rank)
 
 
     [More operations are planned, but not yet implemented -- for example, a
@@ -207,14 +255,26 @@ __all__ = """
 ToneRow
 equivalent
 rotequiv
+rowkey
+unique_rows
+label_rows
+combinatorial_rows
+ALL_COMBINATORIAL
+invariant_rows
 randomrow
+random_rows
+unpacked
+unranked
 ToneRowException
 """.split()
 
 
-from random import shuffle
+from array import array
+from math import factorial
+from random import Random, randrange
 
 from .pcset import PcSet, PcSetException, moderate
+from .pcset import binarylist, transposevalue, invertvalue
 
 
 class ToneRowException(PcSetException):
@@ -239,6 +299,150 @@ class IncompleteRowError(ToneRowException):
         self.message = self.__doc__ % trouble
 
 
+# The four transforms, in the order ToneRow.forms() lists them.
+TRANSFORMS = ('P', 'R', 'I', 'RI')
+
+
+def translation(f):
+    """
+    Utility function. Returns a 256 byte translation table (for
+    bytes.translate) that maps each pitch class pc to f(pc) mod 12.
+    """
+    return bytes(bytearray([f(pc) % 12 if pc < 12 else pc
+                            for pc in range(256)]))
+
+
+# Tables for the encoded forms of ToneRows (see ToneRow.encoded):
+# TRANSPOSE_TABLES[k] adds k to every pitch class, and INVERT_TABLES[k]
+# replaces each pitch class pc with k - pc.
+TRANSPOSE_TABLES = [translation(lambda pc, k=k: pc + k) for k in range(12)]
+INVERT_TABLES = [translation(lambda pc, k=k: k - pc) for k in range(12)]
+
+# Pitch classes to and from their hexadecimal digits, for packed().
+HEX_DIGITS = bytearray(b'0123456789ab')
+TO_HEX = bytes(bytearray([HEX_DIGITS[pc] if pc < 12 else pc
+                          for pc in range(256)]))
+FROM_HEX = bytearray(range(256))
+for pc, digit in enumerate(HEX_DIGITS):
+    FROM_HEX[digit] = pc
+FROM_HEX = bytes(FROM_HEX)
+
+
+def hexachord_tables():
+    """
+    Utility function. Returns (partners, flags) for the binary values (see
+    pcsets.pcset.binaryvalue) of all 924 hexachords h, where c is the
+    complement of h:
+
+        partners[h] = (tc, ts, ic, is) -- bitmasks of the k with T(k)h = c,
+                      T(k)h = h, I(k)h = c and I(k)h = h, where I(k) maps
+                      each pitch class x to k - x.
+
+        flags[h]    = the combinatoriality of every row starting with h, one
+                      bit for each of P, R, I and RI in TRANSFORMS order.
+    """
+    partners = {}
+    flags = array('B', [0] * 4096)
+    for h in range(4096):
+        if bin(h).count('1') != 6:
+            continue
+        c = 4095 ^ h
+        inverse = invertvalue(h)
+        tc = ts = ic = symmetric = 0
+        for k in range(12):
+            transposed = transposevalue(h, k)
+            inverted = transposevalue(inverse, k)
+            if transposed == c:
+                tc |= 1 << k
+            elif transposed == h:
+                ts |= 1 << k
+            if inverted == c:
+                ic |= 1 << k
+            elif inverted == h:
+                symmetric |= 1 << k
+        partners[h] = (tc, ts, ic, symmetric)
+        flags[h] = (bool(tc) | 2 * bool(ts) | 4 * bool(ic)
+                    | 8 * bool(symmetric))
+    return partners, flags
+
+
+HEXACHORD_PARTNERS, HEXACHORD_FLAGS = hexachord_tables()
+
+# Bit of each transform in the combinatoriality flags.
+COMBINATORIAL_BITS = dict([(transform, 1 << i)
+                           for i, transform in enumerate(TRANSFORMS)])
+
+# Prime forms, as spec strings, of the hexachords that are P, I and RI
+# combinatorial (and so R combinatorial as well): Babbitt's six
+# all-combinatorial hexachords.
+ALL_COMBINATORIAL = tuple(sorted(
+    set([str(PcSet(binarylist(h)).prime())
+         for h, flags in enumerate(HEXACHORD_FLAGS) if flags == 15]),
+    key=lambda spec: (len(spec), spec)))
+
+
+# The segments ToneRow.invariants looks at by default: dyads to hexachords.
+SEGMENT_SIZES = (2, 3, 4, 5, 6)
+
+# The number of tone rows, 12!, and the place values of the digits of a
+# row's rank (see ToneRow.rank): 11!, 10!, ... 1!.
+ROW_COUNT = factorial(12)
+FACTORIALS = [factorial(n) for n in range(11, 0, -1)]
+
+# Random bits drawn for each rank: the fewest that can hold 12! - 1.
+RANK_BITS = (ROW_COUNT - 1).bit_length()
+
+
+def trusted(encoded):
+    """
+    Utility function. Returns the ToneRow for 'encoded', 12 bytes holding
+    the pitch classes of a row in order, without checking them -- for rows
+    that are already known to be correct, such as the forms of another
+    ToneRow.
+    """
+    row = ToneRow.__new__(ToneRow)
+    row.encoded = encoded
+    row.definition = list(bytearray(encoded))
+    row._forms = None
+    row._matrix = None
+    row._labels = None
+    return row
+
+
+def unranked(rank):
+    """
+    Returns the ToneRow with the given rank (see ToneRow.rank), an integer
+    from 0 to 12! - 1.
+    """
+    if not 0 <= rank < ROW_COUNT:
+        raise ValueError('a row rank must be from 0 to 12! - 1, not %r'
+                         % (rank,))
+    return trusted(bytes(unrank(rank)))
+
+
+def unrank(rank):
+    """
+    Utility function. Returns the row with the given rank as a bytearray of
+    its 12 pitch classes, without checking the rank.
+    """
+    unused = list(range(12))
+    row = bytearray()
+    for place in FACTORIALS:
+        digit, rank = divmod(rank, place)
+        row.append(unused.pop(digit))
+    row.append(unused[0])
+    return row
+
+
+def unpacked(packed):
+    """
+    Returns the ToneRow for a row packed into an integer by
+    ToneRow.packed(). No checks are made.
+    """
+    digits = ('%012x' % packed).encode('ascii')
+    return trusted(digits[::-1].translate(FROM_HEX))
+
+
 def correct_transposition(pcs, n):
     """
     Utility function.  Takes an input PcSet and returns it with
@@ -263,6 +467,9 @@ class ToneRow(PcSet):
         R(n)
         I(n)
         RI(n)
+        combinatorial()
+        combinatoriality()
+        invariants()
 
     ToneRows also inherit methods from PcSet, but some of these are
     of little use with 12-tone constructs, which set operations tend
@@ -281,6 +488,51 @@ class ToneRow(PcSet):
         super(ToneRow, self).__init__(definition)
         if len(self) < 12:
             raise IncompleteRowError(self)
+        self.encoded = bytes(bytearray(self.definition))
+        self._forms = None
+        self._matrix = None
+        self._labels = None
+
+    def packed(self):
+        """
+        Returns the row packed into a single integer: the pitch class in
+        position i is held in bits 4i to 4i + 3, so '0123456789AB' packs
+        into 0xBA9876543210. See also unpacked(packed).
+        """
+        return int(self.encoded[::-1].translate(TO_HEX), 16)
+
+    def rank(self):
+        """
+        Returns the position of the row in the list of all 12! rows in
+        lexicographic order, from 0 for '0123456789AB' to 12! - 1 for
+        'BA9876543210'. See also unranked(rank).
+        """
+        unused = list(range(12))
+        rank = 0
+        for pc, place in zip(self.definition, FACTORIALS):
+            digit = unused.index(pc)
+            rank += digit * place
+            del unused[digit]
+        return rank
+
+    def form(self, transform, n):
+        """
+        Utility method. Returns the form of the row with transform 'P', 'R',
+        'I' or 'RI' starting on pitch class 'n' (an integer from 0 to 11),
+        from the encoded row and the precomputed tables.
+        """
+        encoded = self.encoded
+        if transform == 'P':
+            table = TRANSPOSE_TABLES[(n - self.definition[0]) % 12]
+        elif transform == 'R':
+            table = TRANSPOSE_TABLES[(n - self.definition[11]) % 12]
+            encoded = encoded[::-1]
+        elif transform == 'I':
+            table = INVERT_TABLES[(n + self.definition[0]) % 12]
+        else:
+            table = INVERT_TABLES[(n + self.definition[11]) % 12]
+            encoded = encoded[::-1]
+        return trusted(encoded.translate(table))
 
     def P(self, n):
         """
@@ -293,7 +545,7 @@ class ToneRow(PcSet):
         input string values 'A' for 10 and 'B' for 11.  Any other strings
         will trigger an IllegalCharacter exception.
         """
-        return ToneRow(correct_transposition(self, n))
+        return self.form('P', moderate(n))
 
     def R(self, n):
         """
@@ -306,7 +558,7 @@ class ToneRow(PcSet):
         input string values 'A' for 10 and 'B' for 11.  Any other strings
         will trigger an IllegalCharacter exception.
         """
-        return ToneRow(correct_transposition(self.reverse(), n))
+        return self.form('R', moderate(n))
 
     def I(self, n):
         """
@@ -319,7 +571,7 @@ class ToneRow(PcSet):
         string values 'A' for 10 and 'B' for 11. Any other strings will
         trigger an IllegalCharacter exception.
         """
-        return ToneRow(correct_transposition(self.invert(), n))
+        return self.form('I', moderate(n))
 
     def RI(self, n):
         """
@@ -333,8 +585,7 @@ class ToneRow(PcSet):
         string values 'A' for 10 and 'B' for 11. Any other strings will
         trigger an IllegalCharacter exception.
         """
-        ri = self.invert().reverse()
-        return ToneRow(correct_transposition(ri, n))
+        return self.form('RI', moderate(n))
 
     def shift(self, i):
         """
@@ -352,9 +603,8 @@ class ToneRow(PcSet):
         accommodate negative numbers; however, in spec string notation (0-9
         and A-B), there is no such thing -- only a single character.
         """
-        # I have to call on an ancestor here, or there's a loop
-        pcs = PcSet(self)
-        return ToneRow(pcs.shift(i))
+        i = int(i) % 12
+        return trusted(self.encoded[12 - i:] + self.encoded[:12 - i])
 
     def rotate(self, i, n):
         """
@@ -376,8 +626,126 @@ class ToneRow(PcSet):
         string notation (0-9 and A-B), there is no such thing -- only a single
         character.
         """
-        pcs = PcSet(self)
-        return ToneRow(correct_transposition(pcs.shift(i), n))
+        return self.shift(i).form('P', moderate(n))
+
+    def forms(self):
+        """
+        Returns all 48 forms of the row as a tuple of (label, ToneRow) pairs:
+        ('P0', self.P(0)) through ('P11', self.P(11)), then the same for R,
+        I and RI. The forms are made once and kept; later calls return the
+        same tuple.
+        """
+        if self._forms is None:
+            self._forms = tuple([(label, trusted(encoded)) for label, encoded
+                                 in encoded_forms(self.encoded)])
+        return self._forms
+
+    def matrix(self):
+        """
+        Returns the 12 x 12 matrix of the row as a tuple of 12 rows, each a
+        tuple of 12 pitch classes. The top row is the row itself, the left
+        column is its inversion I(n) starting on the same pitch class, and
+        each row of the matrix is the prime form starting on the pitch class
+        at its left; so the columns, read downward, are the inversions.
+
+        The matrix is made once and kept; later calls return the same one.
+        """
+        if self._matrix is None:
+            column = self.form('I', self.definition[0]).definition
+            self._matrix = tuple([tuple(self.form('P', n).definition)
+                                  for n in column])
+        return self._matrix
+
+    def label(self, row):
+        """
+        Returns the label ('P0' ... 'RI11', see forms) of the form of this
+        row that 'row' is, or None if it isn't one. 'row' may be a ToneRow,
+        a list of 12 pitch classes, or 12 bytes as in ToneRow.encoded. (A
+        row that is the same as several of its forms gets the first of their
+        labels, in the order forms() lists them.)
+
+        The 48 forms are looked up in a dictionary made the first time it is
+        needed, so each label is a single lookup.
+        """
+        if self._labels is None:
+            labels = {}
+            for label, form in reversed(self.forms()):
+                labels[form.encoded] = label
+            self._labels = labels
+        return self._labels.get(encoding(row))
+
+    def combinatorial(self):
+        """
+        Returns the labels (see forms) of the forms of the row whose first
+        hexachord is the complement of this row's first hexachord -- its
+        hexachordally combinatorial partners, in the order forms() lists
+        them. The first half of each partner fills in the aggregate with the
+        first half of this row, and so do the second halves.
+
+        Every row is at least R combinatorial: its own retrograde, starting
+        on its last note, is always a partner.
+
+        Nothing but four table lookups on the first hexachord is needed; no
+        forms are generated.
+        """
+        first, last = self.definition[0], self.definition[11]
+        tc, ts, ic, symmetric = HEXACHORD_PARTNERS[hexachord(self.encoded)]
+        labels = []
+        for transform, ks, base in (('P', tc, first), ('R', ts, last),
+                                    ('I', ic, -first),
+                                    ('RI', symmetric, -last)):
+            starts = sorted([(k + base) % 12 for k in range(12)
+                             if ks & (1 << k)])
+            labels.extend(['%s%d' % (transform, n) for n in starts])
+        return tuple(labels)
+
+    def combinatoriality(self):
+        """
+        Returns the transforms ('P', 'R', 'I', 'RI') under which the row is
+        hexachordally combinatorial (see combinatorial). A row that has all
+        four is all-combinatorial; its first hexachord is one of
+        ALL_COMBINATORIAL.
+        """
+        flags = HEXACHORD_FLAGS[hexachord(self.encoded)]
+        return tuple([transform for transform in TRANSFORMS
+                      if flags & COMBINATORIAL_BITS[transform]])
+
+    def invariants(self, sizes=SEGMENT_SIZES, contiguous=True):
+        """
+        Returns the segments of the row that other forms of the row (see
+        forms) hold as well, as unordered sets: a list of (positions,
+        partners) pairs, where 'positions' is a tuple of the order positions
+        (0 to 11) of the segment in this row, and 'partners' a tuple of
+        (label, positions) pairs, one for each form that holds the same pitch
+        classes, in the order forms() lists them. Only segments with at least
+        one partner are listed, the smaller ones first. 'sizes' are the
+        numbers of notes in the segments: by default, dyads to hexachords.
+
+        If 'contiguous' is True, the segments are runs of successive notes,
+        and a partner may hold the notes anywhere, as a run of its own:
+
+            >>> print ToneRow('BA2376845019').invariants([3])[0][1][:3]
+            (('P5', (6, 7, 8)), ('R3', (3, 4, 5)), ('R9', (9, 10, 11)))
+
+        -- the first trichord of Webern's Op. 24 row comes back as the third
+        trichord of P5, the second of R3, and so on.
+
+        The row's own retrograde is always a partner, holding each run in
+        the mirror image place.
+
+        If 'contiguous' is False, a segment is any notes of the row, however
+        scattered, and a partner must hold them in the same order positions
+        -- as a set the notes could be anywhere, since every form holds
+        every set somewhere.
+
+        The runs of all 48 forms are put in a dictionary by their binary
+        values (see pcsets.pcset.binaryvalue), and each run of the row
+        looked up there. Scattered segments are found directly: the notes
+        in some positions of a form are the notes in the same positions of
+        the row exactly when those positions are made up of whole cycles of
+        the permutation taking one to the other. See also invariant_rows.
+        """
+        return invariants(self.encoded, segment_sizes(sizes), contiguous)
 
     def contour(self):
         """
@@ -444,21 +812,278 @@ class ToneRow(PcSet):
         return c
 
 
+def zero_forms(encoded):
+    """
+    Utility function. Returns the forms P(0), I(0), R(0) and RI(0) of a row
+    given as 12 bytes, as in ToneRow.encoded.
+    """
+    pcs = bytearray(encoded)
+    first, last = pcs[0], pcs[11]
+    backward = encoded[::-1]
+    return (encoded.translate(TRANSPOSE_TABLES[-first % 12]),
+            encoded.translate(INVERT_TABLES[first]),
+            backward.translate(TRANSPOSE_TABLES[-last % 12]),
+            backward.translate(INVERT_TABLES[last]))
+
+
+def encoded_forms(encoded):
+    """
+    Utility function. Returns all 48 forms of a row given as 12 bytes, as
+    in ToneRow.encoded, as (label, bytes) pairs in the order
+    ToneRow.forms() lists them.
+    """
+    pcs = bytearray(encoded)
+    first, last = pcs[0], pcs[11]
+    backward = encoded[::-1]
+    forms = []
+    for transform, source, tables, base in (
+            ('P', encoded, TRANSPOSE_TABLES, -first),
+            ('R', backward, TRANSPOSE_TABLES, -last),
+            ('I', encoded, INVERT_TABLES, first),
+            ('RI', backward, INVERT_TABLES, last)):
+        for n in range(12):
+            forms.append(('%s%d' % (transform, n),
+                          source.translate(tables[(n + base) % 12])))
+    return forms
+
+
+def canonical(encoded, rotation=False):
+    """
+    Utility function. Returns the row class key (see rowkey) for a row
+    given as 12 bytes, as in ToneRow.encoded.
+    """
+    if rotation:
+        candidates = [encoded[i:] + encoded[:i] for i in range(12)]
+    else:
+        candidates = [encoded]
+    best = None
+    for candidate in candidates:
+        key = min(zero_forms(candidate))
+        if best is None or key < best:
+            best = key
+    return best
+
+
+def rowkey(row, rotation=False):
+    """
+    Returns a key for the family of 'row' (a ToneRow, or any list of the 12
+    pitch classes): the least, in lexicographic order, of its forms P(0),
+    R(0), I(0) and RI(0), as 12 bytes. Two rows have the same key exactly
+    when they are equivalent (see equivalent), so the key can stand in for
+    the whole family -- in a dictionary or a set, for instance.
+
+    If 'rotation' is True, the key is the least of those forms over all 12
+    rotations of the row as well, so rows have the same key exactly when
+    they are rotationally equivalent (see rotequiv).
+    """
+    try:
+        encoded = row.encoded
+    except AttributeError:
+        encoded = ToneRow(row).encoded
+    return canonical(encoded, rotation)
+
+
+def unique_rows(rows, rotation=False):
+    """
+    Generates the first row of each family among 'rows', skipping every row
+    equivalent to one already generated (or rotationally equivalent, if
+    'rotation' is True).
+    """
+    seen = set()
+    for row in rows:
+        key = rowkey(row, rotation)
+        if key not in seen:
+            seen.add(key)
+            yield row
+
+
+def encoding(row):
+    """
+    Utility function. Returns 'row' -- a ToneRow, a sequence of pitch
+    classes, or 12 bytes -- as bytes, like ToneRow.encoded, without any
+    checks; or None if it can't be.
+    """
+    if isinstance(row, ToneRow):
+        return row.encoded
+    if isinstance(row, bytes):
+        return row
+    try:
+        return bytes(bytearray(row))
+    except (TypeError, ValueError):
+        return None
+
+
+def label_rows(reference, rows):
+    """
+    Returns a list with the label of each row in 'rows' as a form of the
+    ToneRow 'reference' (see ToneRow.label) -- or None, for rows that are
+    not forms of it.
+
+    'rows' is any iterable of rows, or all the rows packed end to end in a
+    single bytes object or array('B') of 12 * N pitch classes.
+    """
+    if isinstance(rows, (bytes, bytearray, array)):
+        data = bytes(bytearray(rows))
+        rows = [data[i:i + 12] for i in range(0, len(data), 12)]
+    label = reference.label
+    return [label(row) for row in rows]
+
+
+def hexachord(encoded):
+    """
+    Utility function. Returns the binary value of the first six pitch
+    classes of 'encoded' (see ToneRow.encoded).
+    """
+    value = 0
+    for pc in bytearray(encoded[:6]):
+        value |= 1 << pc
+    return value
+
+
+def combinatorial_rows(rows):
+    """
+    Returns an array('B') with the combinatoriality of each row in 'rows'
+    (see ToneRow.combinatoriality) as bits: 1 for P, 2 for R, 4 for I and
+    8 for RI, so that all-combinatorial rows have the value 15.
+
+    'rows' is any iterable of rows, or all the rows packed end to end in a
+    single bytes object or array('B') of 12 * N pitch classes -- the fast
+    way to screen a great many rows, since only the first six bytes of each
+    are read, and no ToneRows are made.
+    """
+    flags = HEXACHORD_FLAGS
+    if isinstance(rows, (bytes, bytearray, array)):
+        data = bytearray(rows)
+        found = array('B', [0]) * (len(data) // 12)
+        for i in range(len(found)):
+            start = 12 * i
+            value = 0
+            for pc in data[start:start + 6]:
+                value |= 1 << pc
+            found[i] = flags[value]
+        return found
+    return array('B', [flags[hexachord(encoding(row))] for row in rows])
+
+
+def segment_sizes(sizes):
+    """
+    Utility function. Returns the segment 'sizes' (see ToneRow.invariants)
+    as a set, checking that each is from 1 to 12 notes.
+    """
+    sizes = set(sizes)
+    for size in sizes:
+        if not 0 < size <= 12:
+            raise ValueError('a segment of %r notes' % (size,))
+    return sizes
+
+
+def run_invariants(encoded, forms, own, sizes):
+    """
+    Utility function. ToneRow.invariants for contiguous segments: a
+    dictionary of the partners of each run of the row, by its positions.
+    """
+    longest = max(sizes)
+    # runs[value]: every (label, start) of a run holding that set
+    runs = {}
+    for label, form in forms:
+        pcs = bytearray(form)
+        for start in range(12):
+            value = 0
+            for end in range(start, min(12, start + longest)):
+                value |= 1 << pcs[end]
+                if end - start + 1 in sizes:
+                    runs.setdefault(value, []).append((label, start))
+    found = {}
+    pcs = bytearray(encoded)
+    for start in range(12):
+        value = 0
+        for end in range(start, min(12, start + longest)):
+            value |= 1 << pcs[end]
+            size = end - start + 1
+            if size not in sizes:
+                continue
+            partners = [(label, tuple(range(first, first + size)))
+                        for label, first in runs[value] if label != own]
+            if partners:
+                found[tuple(range(start, end + 1))] = partners
+    return found
+
+
+def position_invariants(encoded, forms, own, sizes):
+    """
+    Utility function. ToneRow.invariants for scattered segments: a
+    dictionary of the partners of each segment of the row, by its
+    positions.
+    """
+    where = bytearray(12)
+    for position, pc in enumerate(bytearray(encoded)):
+        where[pc] = position
+    found = {}
+    for label, form in forms:
+        if label == own:
+            continue
+        pcs = bytearray(form)
+        # the cycles of the permutation of positions, as bitmasks
+        seen = 0
+        unions = [0]
+        for position in range(12):
+            if seen & (1 << position):
+                continue
+            cycle = 0
+            while not cycle & (1 << position):
+                cycle |= 1 << position
+                position = where[pcs[position]]
+            seen |= cycle
+            unions.extend([union | cycle for union in unions])
+        for union in unions:
+            if bin(union).count('1') in sizes:
+                positions = tuple([position for position in range(12)
+                                   if union & (1 << position)])
+                found.setdefault(positions, []).append((label, positions))
+    return found
+
+
+def invariants(encoded, sizes, contiguous):
+    """
+    Utility function. ToneRow.invariants for a row given as 12 bytes, as in
+    ToneRow.encoded, and a set of segment sizes.
+    """
+    own = 'P%d' % bytearray(encoded)[0]
+    forms = encoded_forms(encoded)
+    if contiguous:
+        found = run_invariants(encoded, forms, own, sizes)
+    else:
+        found = position_invariants(encoded, forms, own, sizes)
+    return [(positions, tuple(found[positions]))
+            for positions in sorted(found, key=lambda p: (len(p), p))]
+
+
+def invariant_rows(rows, sizes=SEGMENT_SIZES, contiguous=True):
+    """
+    Returns a list with the invariant segments of each row in 'rows' (see
+    ToneRow.invariants, which describes 'sizes' and 'contiguous').
+
+    'rows' is any iterable of rows, or all the rows packed end to end in a
+    single bytes object or array('B') of 12 * N pitch classes, as
+    random_rows returns them; no ToneRows are made for these.
+    """
+    sizes = segment_sizes(sizes)
+    if isinstance(rows, (bytes, bytearray, array)):
+        data = bytes(bytearray(rows))
+        rows = [data[i:i + 12] for i in range(0, len(data), 12)]
+    return [invariants(encoding(row), sizes, contiguous) for row in rows]
+
+
 def equivalent(a, b):
     """
     Returns True if the operations P(n), R(n), I(n), and RI(n) return the same
     family of ToneRows for both 'a' and 'b'. In other words, all 48 possible
     forms (four methods times 12 different starting points) for 'a' and 'b'
     should match. [In reality, if *any* match, then all match.]
+
+    This is the same as comparing rowkey(a) and rowkey(b).
     """
-    standard = b.P(0)
-    # abracadabra
-    methods = [a.P, a.I, a.R, a.RI]
-    for f in methods:
-        test = f(0)
-        if list(test) == list(standard):
-            return True
-    return False
+    return rowkey(a) == rowkey(b)
 
 
 def rotequiv(a, b):
@@ -466,22 +1091,56 @@ def rotequiv(a, b):
     Rotational equivalence:
     Returns True if any of the 12 possible rotations of 'a' or 'b'
     are equivalent (see definition for equivalent(a, b)).
+
+    This is the same as comparing rowkey(a, True) and rowkey(b, True).
     """
-    for n in range(12):
-        if equivalent(a.shift(n), b):
-            return True
-    return False
+    return rowkey(a, True) == rowkey(b, True)
 
 
 def randomrow():
     """
-    Returns a randomly generated ToneRow.  This is probably not perfect;
-    it uses the default Python pseudorandom number generator, and with
-    12 factorial combinations, there is no guarantee that every possible
-    row will be generated over time on every machine architecture.
+    Returns a randomly generated ToneRow. Every one of the 12! rows is
+    equally likely: the row is unranked (see unranked) from a rank drawn
+    with random.randrange, so the default Python pseudorandom number
+    generator (and random.seed) decides which. For many rows at once, or a
+    stream of rows of its own, see random_rows.
+    """
+    return trusted(bytes(unrank(randrange(ROW_COUNT))))
+
 
-    That's why we call this 'experimental'!
+def random_rows(count, seed=None, classes=False):
+    """
+    Returns 'count' random rows, packed end to end in an array('B') of
+    12 * count pitch classes -- the form label_rows and combinatorial_rows
+    read fastest. Each row is unranked (see unranked) from a rank drawn
+    uniformly from all 12!, so every row is equally likely.
+
+    The rows come from a random number generator of their own, not the
+    one the random module shares: 'seed' seeds it, so the same seed always
+    gives the same rows, or it may be a random.Random object to draw from
+    (which carries on from one call to the next).
+
+    If 'classes' is True, each row is instead the key (see rowkey) of a
+    row class, and every class is equally likely. Most classes hold 48
+    rows but a few symmetrical ones only 24, so a row drawn from one of
+    the larger classes is kept only half the time.
     """
-    r = list(range(12))
-    shuffle(r)
-    return ToneRow(r)
+    if isinstance(seed, Random):
+        rng = seed
+    else:
+        rng = Random(seed)
+    bits = rng.getrandbits
+    coin = rng.random
+    rows = array('B')
+    while len(rows) < 12 * count:
+        rank = bits(RANK_BITS)
+        if rank >= ROW_COUNT:
+            continue
+        row = unrank(rank)
+        if classes:
+            forms = zero_forms(bytes(row))
+            if len(set(forms)) == 4 and coin() < 0.5:
+                continue
+            row = bytearray(min(forms))
+        rows.extend(row)
+    return rows
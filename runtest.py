@@ -40,6 +40,12 @@ pcops
 catalog
 noteops
 tonerow
+midi
+corpus
+pitchset
+chroma
+rowsearch
+segments
 """.split()
 
 
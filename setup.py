@@ -30,7 +30,10 @@ to your Python distribution's site libraries.
 
 __metaclass__ = type
 
+import os
+
 from setuptools import setup, find_packages
+from setuptools.command.build_py import build_py
 
 
 PCSETS_VERSION = '2.0.2'  # <===================== (auto-substituted)
@@ -60,6 +63,23 @@ Topic :: Artistic Software
 Topic :: Software Development :: Libraries :: Python Modules
 """.strip().split('\n')
 
+
+class build_py_with_tables(build_py):
+    """
+    Builds the package as usual, then generates the precomputed lookup
+    tables (see pcsets.catalog.write_tables) into the build as package data,
+    so that installed copies never have to compute them.
+    """
+
+    def run(self):
+        build_py.run(self)
+        if not self.dry_run:
+            from pcsets import catalog
+            target = os.path.join(self.build_lib, 'pcsets', catalog.TABLE_NAME)
+            self.announce('generating %s' % target, level=2)
+            catalog.write_tables(target)
+
+
 setup(
     name='pcsets',
     version=PCSETS_VERSION,
@@ -73,4 +93,5 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     zip_safe=False,
+    cmdclass={'build_py': build_py_with_tables},
 )
@@ -27,4 +27,10 @@ test_noteops
 test_pcops
 test_pcset
 test_tonerow
+test_midi
+test_corpus
+test_pitchset
+test_chroma
+test_rowsearch
+test_segments
 """.split()
@@ -35,17 +35,33 @@ in future versions.
 __metaclass__ = type
 
 
+import os
+import pickle
+import shutil
+import tempfile
 import unittest
 from functools import reduce
+from multiprocessing import Pool
 from operator import add
 
-from pcsets.catalog import SetCatalog
+from pcsets.pcset import PcSet, binaryvalue
+from pcsets.pcops import same_prime, set_equality, prime_subset_of
+from pcsets import catalog
+from pcsets.catalog import SetCatalog, PAGE_FILE, PICKLE_FILE, write_tables
+from pcsets.catalog import ModulusError
+from pcsets.catalog import count_prime_classes, count_tn_classes
+from pcsets.catalog import gap_necklaces, prime_values
 
 
 # Let's just do this once.
 maincatalog = SetCatalog()
 
 
+def catalog_size(dummy):
+    # for PersistenceTests; must live at module level to be pickled
+    return len(SetCatalog())
+
+
 class AllTests(unittest.TestCase):
 
     def setUp(self):
@@ -69,3 +85,304 @@ class AllTests(unittest.TestCase):
     def test_total_length_via_iter(self):
         flatcatalog = list(self.r)
         self.assertEqual(len(flatcatalog), self.total)
+
+
+class SetClassTests(unittest.TestCase):
+
+    def setUp(self):
+        self.r = maincatalog
+
+    def test_class_index_finds_prime(self):
+        primes = list(self.r)
+        for pcs in (PcSet('047'), PcSet('B37'), [9, 0, 4], '024579B'):
+            self.assertTrue(same_prime(primes[self.r.class_index(pcs)],
+                                       PcSet(pcs)))
+
+    def test_class_table(self):
+        table = self.r.class_table()
+        self.assertEqual(len(table), 4096)
+        for pcs in (PcSet('047'), PcSet('B37'), PcSet('0258'), PcSet([])):
+            self.assertEqual(table[binaryvalue(pcs)],
+                             self.r.class_index(pcs))
+        table[0] = 99
+        self.assertEqual(self.r.class_index([]), 0)
+
+    def test_every_set_has_a_class(self):
+        total = 0
+        for prime in self.r:
+            total += len(self.r.member_values(prime))
+        self.assertEqual(total, 4096)
+
+    def test_members_match_transformations(self):
+        # members() must agree with the 24 T(n)/T(n)I calls, deduplicated.
+        for prime in self.r.page(4):
+            expected = []
+            for n in range(12):
+                for candidate in (prime.T(n), prime.TnI(n)):
+                    if not any(set_equality(candidate, e) for e in expected):
+                        expected.append(candidate)
+            found = list(self.r.members(prime))
+            self.assertEqual(len(found), len(expected))
+            for e in expected:
+                self.assertTrue(any(set_equality(e, f) for f in found))
+
+    def test_symmetrical_class_size(self):
+        self.assertEqual(len(list(self.r.members('0369'))), 3)
+        self.assertEqual(len(self.r.member_values('0')), 12)
+
+    def test_orbit_operations(self):
+        prime = PcSet('037')
+        for value, operation, n in self.r.orbit('047'):
+            if operation == 'Tn':
+                member = prime.T(n)
+            else:
+                member = prime.TnI(n)
+            self.assertEqual(binaryvalue(member), value)
+
+
+class SetComplexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.r = maincatalog
+
+    def brute_force(self, a, b, hard):
+        if len(b) in (len(a), 12 - len(a)):
+            return False
+        c = a.complement()
+        if hard:
+            return ((prime_subset_of(a, b) and prime_subset_of(c, b))
+                    or (prime_subset_of(b, a) and prime_subset_of(b, c)))
+        return (prime_subset_of(a, b) or prime_subset_of(b, a)
+                or prime_subset_of(c, b) or prime_subset_of(b, c))
+
+    def test_K_against_pcops(self):
+        for a in (PcSet('0148'), PcSet('01247')):
+            for b in self.r:
+                self.assertEqual(self.r.K(a, b), self.brute_force(a, b, False))
+
+    def test_Kh_against_pcops(self):
+        for a in (PcSet('0148'), PcSet('013679')):
+            for b in self.r:
+                self.assertEqual(self.r.Kh(a, b), self.brute_force(a, b, True))
+
+    def test_complex_about(self):
+        nexus = PcSet('0148')
+        found = self.r.complex_about(nexus, hard=True)
+        self.assertEqual(len(found), bin(self.r.complex_bits(nexus, True))
+                         .count('1'))
+        for entry in found:
+            self.assertTrue(self.r.Kh(nexus, entry))
+
+    def test_same_cardinality_unrelated(self):
+        self.assertFalse(self.r.K('0148', '0148'))
+        self.assertFalse(self.r.K('013', '012345679'))
+
+
+class WorkingDirectory(unittest.TestCase):
+
+    # Tests that store files do so in a fresh directory.
+
+    def setUp(self):
+        self.origin = os.getcwd()
+        self.workdir = tempfile.mkdtemp()
+        os.chdir(self.workdir)
+        # ignore any tables installed with the package
+        self.tables = catalog.TABLE_FILE
+        catalog.TABLE_FILE = os.path.join(self.workdir, catalog.TABLE_NAME)
+
+    def tearDown(self):
+        catalog.TABLE_FILE = self.tables
+        os.chdir(self.origin)
+        shutil.rmtree(self.workdir)
+
+
+class TemperamentTests(WorkingDirectory):
+
+    def test_burnside_matches_catalog(self):
+        expected = [1, 1, 6, 12, 29, 38, 50, 38, 29, 12, 6, 1, 1]
+        found = [count_prime_classes(12, n) for n in range(13)]
+        self.assertEqual(found, expected)
+
+    def test_enumeration_matches_burnside(self):
+        for modulus in range(1, 17):
+            for n in range(1, modulus + 1):
+                necklaces = len(list(gap_necklaces(n, modulus - n)))
+                self.assertEqual(necklaces, count_tn_classes(modulus, n))
+                bracelets = len(list(prime_values(modulus, n)))
+                self.assertEqual(bracelets, count_prime_classes(modulus, n))
+
+    def test_twelve_tone_primes(self):
+        for n in range(13):
+            values = [binaryvalue(p) for p in maincatalog.page(n)]
+            self.assertEqual(values, list(prime_values(12, n)))
+
+    def test_quarter_tone_catalog(self):
+        r = SetCatalog(modulus=24, store=False)
+        self.assertEqual(len(r.page(3)), count_prime_classes(24, 3))
+        self.assertEqual(r.page(3)[:3], [(0, 1, 2), (0, 1, 3), (0, 1, 4)])
+        self.assertEqual(len(r), sum(count_prime_classes(24, n)
+                                     for n in range(25)))
+
+    def test_set_classes_twelve_tone_only(self):
+        r = SetCatalog(modulus=24, store=False)
+        for method in [r.class_index, r.orbit, r.member_values, r.ivec,
+                       r.complex_about]:
+            self.assertRaises(ModulusError, method, [0, 13])
+        self.assertRaises(ModulusError, list, r.members([0, 13]))
+        self.assertRaises(ModulusError, r.K, [0, 1], [0, 13])
+        self.assertRaises(ModulusError, r.Kh, [0, 1], [0, 13])
+        self.assertRaises(ModulusError, r.class_table)
+        self.assertEqual(r.orbits, None)
+
+    def test_stored_pages(self):
+        r = SetCatalog(modulus=19)
+        first = list(r.stream_values(7))
+        self.assertTrue(os.path.exists(PAGE_FILE % (19, 7)))
+        self.assertEqual(list(r.stream_values(7)), first)
+
+    def test_abandoned_page_not_stored(self):
+        r = SetCatalog(modulus=19)
+        values = r.stream_values(8)
+        next(values)
+        values.close()
+        self.assertEqual(os.listdir('.'), [])
+
+    def test_failed_page_header_removed(self):
+        class Unwritable:
+            def write(self, data):
+                raise IOError('disk full')
+        opened = []
+
+        def open_temporary(filename):
+            storage, temporary = original(filename)
+            storage.close()
+            storage = Unwritable()
+            storage.close = lambda: opened.append(temporary)
+            return storage, temporary
+        original = catalog.open_temporary
+        catalog.open_temporary = open_temporary
+        try:
+            r = SetCatalog(modulus=19, failsafe=True)
+            self.assertEqual(len(list(r.stream_values(3))),
+                             count_prime_classes(19, 3))
+            r = SetCatalog(modulus=19)
+            self.assertRaises(IOError, list, r.stream_values(3))
+        finally:
+            catalog.open_temporary = original
+        self.assertEqual(len(opened), 2)
+        self.assertEqual(os.listdir('.'), [])
+
+    def test_corrupt_page_rewritten(self):
+        r = SetCatalog(modulus=19)
+        first = list(r.stream_values(7))
+        storage = open(PAGE_FILE % (19, 7), 'r+b')
+        storage.seek(-3, 2)
+        storage.write(b'xyz')
+        storage.close()
+        self.assertEqual(list(r.stream_values(7)), first)
+        self.assertEqual(list(r.stream_values(7)), first)
+
+
+class PersistenceTests(WorkingDirectory):
+
+    def stored_files(self):
+        return sorted(f for f in os.listdir('.') if not f.endswith('.lock'))
+
+    def test_store_and_retrieve(self):
+        SetCatalog()
+        self.assertEqual(self.stored_files(), [PICKLE_FILE])
+        self.assertEqual(len(SetCatalog()), 224)
+
+    def test_corrupt_file_rebuilt(self):
+        SetCatalog()
+        storage = open(PICKLE_FILE, 'r+b')
+        storage.seek(-10, 2)
+        storage.write(b'0123456789')
+        storage.close()
+        self.assertEqual(len(SetCatalog()), 224)
+        self.assertEqual(len(SetCatalog()), 224)
+
+    def test_truncated_file_rebuilt(self):
+        SetCatalog()
+        storage = open(PICKLE_FILE, 'r+b')
+        storage.truncate(100)
+        storage.close()
+        self.assertEqual(len(SetCatalog()), 224)
+
+    def test_unchecked_pickle_rebuilt(self):
+        # a bare pickle, as written by earlier versions
+        storage = open(PICKLE_FILE, 'wb')
+        pickle.dump([[] for page in range(13)], storage, -1)
+        storage.close()
+        self.assertEqual(len(SetCatalog()), 224)
+
+    def test_failsafe_write(self):
+        os.mkdir('readonly')
+        os.chdir('readonly')
+        os.chmod('.', 0o555)
+        try:
+            if os.access('.', os.W_OK):
+                self.skipTest("running as root; permissions don't apply")
+            self.assertEqual(len(SetCatalog(failsafe=True)), 224)
+            self.assertRaises(IOError, SetCatalog)
+        finally:
+            os.chmod('.', 0o755)
+            os.chdir('..')
+
+    def test_failsafe_write_failure(self):
+        # the same path as test_failsafe_write, whoever runs the tests
+
+        def unwritable(filename):
+            raise IOError('not writable')
+        original = catalog.open_temporary
+        catalog.open_temporary = unwritable
+        try:
+            self.assertEqual(len(SetCatalog(failsafe=True)), 224)
+            self.assertRaises(IOError, SetCatalog)
+        finally:
+            catalog.open_temporary = original
+        self.assertEqual(self.stored_files(), [])
+
+    def test_concurrent_processes(self):
+        pool = Pool(8)
+        try:
+            sizes = pool.map(catalog_size, range(16))
+        finally:
+            pool.close()
+            pool.join()
+        self.assertEqual(sizes, [224] * 16)
+        self.assertEqual(self.stored_files(), [PICKLE_FILE])
+
+
+class PackagedTableTests(WorkingDirectory):
+
+    def test_tables_match_computed(self):
+        write_tables()
+        loaded = SetCatalog()
+        computed = SetCatalog(rebuild=True, store=False)
+        # loading the tables must not fall back on catalog.pkl
+        self.assertFalse(os.path.exists(PICKLE_FILE))
+        self.assertEqual([list(p) for p in loaded],
+                         [list(p) for p in computed])
+        for pcs in ('0148', '01247', '013679', '0369', ''):
+            self.assertEqual(loaded.orbit(pcs), computed.orbit(pcs))
+            self.assertEqual(loaded.ivec(pcs), computed.ivec(pcs))
+            self.assertEqual(loaded.complex_bits(pcs),
+                             computed.complex_bits(pcs))
+            self.assertEqual(loaded.complex_bits(pcs, True),
+                             computed.complex_bits(pcs, True))
+            self.assertEqual(list(loaded.member_values(pcs)),
+                             list(computed.member_values(pcs)))
+
+    def test_corrupt_tables_ignored(self):
+        write_tables()
+        storage = open(catalog.TABLE_FILE, 'r+b')
+        storage.seek(-1, 2)
+        storage.write(b'!')
+        storage.close()
+        self.assertEqual(len(SetCatalog()), 224)
+        self.assertTrue(os.path.exists(PICKLE_FILE))
+
+    def test_ivec_table(self):
+        for prime in maincatalog:
+            self.assertEqual(maincatalog.ivec(prime.T(5)), prime.ivec())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+
+# pcsets 2.0.2 -- Pitch Class Sets for Python.
+#
+# Copyright 2007 Bruce H. McCosar
+#
+# This file is part of the package 'pcsets'
+#
+# The package 'pcsets' is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3 of
+# the License, or (at your option) any later version.
+#
+# The package 'pcsets' is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Test suite for chroma.py -- EXPERIMENTAL
+"""
+
+__metaclass__ = type
+
+import os
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import unittest
+from array import array
+from pcsets.pcset import binaryvalue
+from pcsets.chroma import ChromaFormatError, chroma_values, load_chroma
+
+
+def array_bytes(values):
+    try:
+        return values.tobytes()
+    except AttributeError:
+        # Python 2
+        return values.tostring()
+
+
+def npy_bytes(frames, code='f', order='<', shape=None, fortran=False):
+    # what numpy.save would write for an array of these frames
+    values = array(code, [x for frame in frames for x in frame])
+    if order != ('<' if sys.byteorder == 'little' else '>'):
+        values.byteswap()
+    if shape is None:
+        shape = (len(frames), 12)
+    descr = order + {'f': 'f4', 'd': 'f8'}[code]
+    header = "{'descr': '%s', 'fortran_order': %s, 'shape': %r, }" % (
+        descr, fortran, shape)
+    header += ' ' * (63 - (len(header) + 10) % 64) + '\n'
+    return (b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header))
+            + header.encode('latin1') + array_bytes(values))
+
+
+def random_frames(count, seed=3):
+    generator = random.Random(seed)
+    return [[generator.random() ** 3 for pc in range(12)]
+            for frame in range(count)]
+
+
+class ThresholdTests(unittest.TestCase):
+
+    def setUp(self):
+        self.frames = random_frames(400)
+
+    def test_relative(self):
+        indices, values = chroma_values(self.frames, threshold=0.6)
+        self.assertEqual(list(indices), list(range(400)))
+        for frame, value in zip(self.frames, values):
+            cut = 0.6 * max(frame)
+            expected = [pc for pc in range(12) if frame[pc] >= cut]
+            self.assertEqual(value, binaryvalue(expected))
+
+    def test_absolute_and_silence(self):
+        frames = [[0.0] * 12, [0.3] * 6 + [0.1] * 6, [0.0] * 11 + [2.0]]
+        indices, values = chroma_values(frames, 0.2, relative=False)
+        self.assertEqual(list(values), [0, 63, 2048])
+        self.assertEqual(list(chroma_values(frames, 0.0)[1]), [0, 4095, 2048])
+
+    def test_top(self):
+        frame = [0.1 * pc for pc in range(12)]
+        self.assertEqual(list(chroma_values([frame], 0.1, top=3)[1]),
+                         [binaryvalue([9, 10, 11])])
+        self.assertEqual(list(chroma_values([frame], 0.95, top=3)[1]),
+                         [binaryvalue([11])])
+
+    def test_hysteresis(self):
+        strengths = [0.2, 0.6, 0.4, 0.3, 0.1, 0.4, 0.6]
+        frames = [[1.0, s] + [0.0] * 10 for s in strengths]
+        plain = chroma_values(frames, 0.5)[1]
+        held = chroma_values(frames, 0.5, low=0.25)[1]
+        self.assertEqual([v >> 1 for v in plain], [0, 1, 0, 0, 0, 0, 1])
+        self.assertEqual([v >> 1 for v in held], [0, 1, 1, 1, 0, 0, 1])
+        self.assertRaises(ValueError, chroma_values, frames, 0.5, low=0.7)
+
+    def test_collapse(self):
+        frames = [[1.0] + [0.0] * 11] * 3 + [[0.0] * 11 + [1.0]] * 2 + \
+            [[1.0] + [0.0] * 11]
+        indices, values = chroma_values(frames, collapse=True)
+        self.assertEqual(list(indices), [0, 3, 5])
+        self.assertEqual(list(values), [1, 2048, 1])
+
+    def test_flat_array(self):
+        flat = array('d', [x for frame in self.frames for x in frame])
+        self.assertEqual(chroma_values(flat), chroma_values(self.frames))
+        self.assertRaises(ChromaFormatError, chroma_values, flat[:-1])
+        self.assertRaises(ChromaFormatError, chroma_values, [[1.0] * 11])
+
+
+class NpyTests(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.frames = random_frames(300)
+        self.expected = chroma_values(array('f', [x for frame in self.frames
+                                                  for x in frame]),
+                                      0.4, low=0.2, collapse=True)
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def save(self, data):
+        filename = os.path.join(self.workdir, 'chroma.npy')
+        with open(filename, 'wb') as f:
+            f.write(data)
+        return filename
+
+    def test_types_and_byte_orders(self):
+        for code in 'fd':
+            for order in '<>':
+                filename = self.save(npy_bytes(self.frames, code, order))
+                found = load_chroma(filename, 0.4, low=0.2, collapse=True)
+                self.assertEqual(found, self.expected)
+
+    def test_bad_files(self):
+        for data in [b'', b'not numpy at all',
+                     npy_bytes(self.frames, shape=(300, 13)),
+                     npy_bytes(self.frames, fortran=True),
+                     npy_bytes(self.frames)[:-4]]:
+            self.assertRaises(ChromaFormatError, load_chroma, self.save(data))
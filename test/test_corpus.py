@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+# pcsets 2.0.2 -- Pitch Class Sets for Python.
+#
+# Copyright 2007 Bruce H. McCosar
+#
+# This file is part of the package 'pcsets'
+#
+# The package 'pcsets' is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3 of
+# the License, or (at your option) any later version.
+#
+# The package 'pcsets' is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Test suite for corpus.py -- EXPERIMENTAL
+"""
+
+__metaclass__ = type
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from pcsets.pcset import PcSet, binaryvalue
+from pcsets import corpus
+from pcsets.corpus import Corpus, read_corpus, chunks
+
+
+def random_specs(count, seed=12):
+    generator = random.Random(seed)
+    specs = []
+    for i in range(count):
+        n = generator.randint(0, 14)
+        specs.append(''.join([generator.choice('0123456789AB')
+                              for j in range(n)]))
+    return specs
+
+
+class CorpusTests(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.specs = random_specs(3000)
+        lines = ['%s\tpiece %d\t%d' % (spec, i % 5, i)
+                 for i, spec in enumerate(self.specs)]
+        self.filename = os.path.join(self.workdir, 'specs.txt')
+        with open(self.filename, 'wb') as f:
+            f.write('\n'.join(lines).encode('ascii'))
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def assertDecoded(self, found, specs):
+        self.assertEqual(len(found), len(specs))
+        for i, spec in enumerate(specs):
+            pcs = PcSet(spec)
+            self.assertEqual(found.segment(i), list(pcs))
+            self.assertEqual(found.masks[i], binaryvalue(pcs))
+
+    def test_same_as_pcset(self):
+        self.assertDecoded(read_corpus(self.filename), self.specs)
+
+    def test_bytes_and_columns(self):
+        found = read_corpus(b'0146A\r\n\n  047 \t I\tC\nBA9B\n',
+                            columns=True)
+        self.assertDecoded(found, ['0146A', '047', 'BA9'])
+        self.assertEqual(found.columns, [[''], [' I', 'C'], ['']])
+        self.assertEqual([str(pcs) for pcs in found], ['0146A', '047', 'BA9'])
+
+    def test_errors(self):
+        errors = []
+        found = read_corpus(b'047\n01x\n59\n', errors=errors)
+        self.assertDecoded(found, ['047', '59'])
+        self.assertEqual(errors, [(4, '01x')])
+
+    def test_chunks(self):
+        parts = list(chunks(self.filename, size=1000, columns=True))
+        self.assertTrue(len(parts) > 10)
+        whole = Corpus(columns=True)
+        for part in parts:
+            whole.extend(part)
+        self.assertDecoded(whole, self.specs)
+        self.assertEqual([row[1] for row in whole.columns],
+                         [str(i) for i in range(len(self.specs))])
+
+    def test_processes(self):
+        errors = []
+        found = read_corpus(self.filename, columns=True, errors=errors,
+                            processes=3)
+        self.assertDecoded(found, self.specs)
+        self.assertEqual(len(found.columns), len(self.specs))
+        self.assertEqual(errors, [])
+
+    def test_small_blocks(self):
+        original = corpus.CHUNK_SIZE
+        corpus.CHUNK_SIZE = 7
+        try:
+            self.assertDecoded(read_corpus(self.filename), self.specs)
+        finally:
+            corpus.CHUNK_SIZE = original
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+
+# pcsets 2.0.2 -- Pitch Class Sets for Python.
+#
+# Copyright 2007 Bruce H. McCosar
+#
+# This file is part of the package 'pcsets'
+#
+# The package 'pcsets' is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3 of
+# the License, or (at your option) any later version.
+#
+# The package 'pcsets' is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Test suite for midi.py -- EXPERIMENTAL
+"""
+
+__metaclass__ = type
+
+import io
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+from pcsets import midi
+from pcsets.midi import MidiFormatError, simultaneities, windows
+from pcsets.midi import mask_arrays, read_many, midi_files
+
+
+# Building test files. Events are (delta, bytes) pairs.
+
+def delta(n):
+    out = [n & 0x7F]
+    n >>= 7
+    while n:
+        out.insert(0, 0x80 | (n & 0x7F))
+        n >>= 7
+    return bytes(bytearray(out))
+
+
+def track(events):
+    data = b''.join([delta(t) + bytes(bytearray(e)) for t, e in events])
+    data += b'\x00\xff\x2f\x00'
+    return b'MTrk' + struct.pack('>I', len(data)) + data
+
+
+def smf(tracks, division=480, format=1):
+    header = struct.pack('>HHH', format, len(tracks), division)
+    return (b'MThd' + struct.pack('>I', 6) + header + b''.join(tracks))
+
+
+def chord(keys, length, channel=0):
+    on = [(0, [0x90 | channel, key, 100]) for key in keys]
+    off = [(0, [0x80 | channel, key, 0]) for key in keys]
+    off[0] = (length, off[0][1])
+    return on + off
+
+
+# C major for one beat, then F major, at 120 bpm: half a second each.
+CADENCE = smf([track(chord([60, 64, 67], 480) + chord([65, 69, 72], 480))])
+
+
+class SimultaneityTests(unittest.TestCase):
+
+    def test_chords(self):
+        found = [(t, str(pcs)) for t, pcs in simultaneities(CADENCE)]
+        self.assertEqual(found, [(0.0, '047'), (0.5, '059')])
+
+    def test_masks(self):
+        found = list(simultaneities(CADENCE, masks=True))
+        self.assertEqual(found, [(0.0, 145), (0.5, 545)])
+
+    def test_running_status_and_zero_velocity(self):
+        events = [(0, [0x90, 60, 100]), (0, [64, 100]), (240, [60, 0]),
+                  (240, [64, 0])]
+        found = [(t, str(pcs)) for t, pcs in
+                 simultaneities(smf([track(events)]))]
+        self.assertEqual(found, [(0.0, '04'), (0.25, '4')])
+
+    def test_tempo_map_and_merged_tracks(self):
+        # 60 bpm after the first beat; tempo lives in its own track
+        tempo = track([(480, [0xFF, 0x51, 0x03, 0x0F, 0x42, 0x40])])
+        melody = track([(0, [0x90, 62, 90]), (480, [0x80, 62, 0]),
+                        (0, [0x90, 69, 90]), (480, [0x80, 69, 0])])
+        bass = track([(0, [0x91, 38, 90]), (960, [0x81, 38, 0])])
+        found = [(t, str(pcs)) for t, pcs in
+                 simultaneities(smf([tempo, melody, bass]))]
+        self.assertEqual(found, [(0.0, '2'), (0.5, '29')])
+
+    def test_drums_skipped(self):
+        events = chord([36, 42], 480, channel=9) + chord([60], 480)
+        data = smf([track(events)])
+        found = [str(pcs) for t, pcs in simultaneities(data)]
+        self.assertEqual(found, ['0'])
+        found = [str(pcs) for t, pcs in simultaneities(data, drums=True)]
+        self.assertEqual(found, ['06', '0'])
+
+    def test_smpte_division(self):
+        # 25 frames per second, 40 ticks per frame: 1000 ticks a second
+        data = smf([track(chord([60], 500) + chord([61], 500))],
+                   division=0xE728)
+        self.assertEqual([t for t, pcs in simultaneities(data)], [0.0, 0.5])
+
+    def test_bad_files(self):
+        for data in [b'', b'RIFF' + b'\x00' * 20, CADENCE[:-13],
+                     smf([track([(0, [0x40, 60])])])]:
+            self.assertRaises(MidiFormatError, list, simultaneities(data))
+
+
+class WindowTests(unittest.TestCase):
+
+    def test_windows(self):
+        found = [(t, str(pcs)) for t, pcs in windows(CADENCE, 0.25)]
+        self.assertEqual(found, [(0.0, '047'), (0.25, '047'),
+                                 (0.5, '059'), (0.75, '059')])
+
+    def test_wide_windows(self):
+        found = [str(pcs) for t, pcs in windows(CADENCE, 0.4)]
+        self.assertEqual(found, ['047', '04579', '059'])
+
+    def test_rests_are_empty(self):
+        rest = [(720, [0x90, 62, 64]), (240, [0x80, 62, 0])]
+        data = smf([track(chord([60], 240) + rest)])
+        found = list(windows(data, 0.25, masks=True))
+        self.assertEqual(found, [(0.0, 1), (0.25, 0), (0.5, 0),
+                                 (0.75, 0), (1.0, 4)])
+
+    def test_same_key_across_tracks(self):
+        # one track releases middle C on the tick another strikes it
+        first = track([(0, [0x90, 60, 100]), (480, [0x80, 60, 0])])
+        second = track([(480, [0x90, 60, 100]), (480, [0x80, 60, 0]),
+                        (0, [0x90, 62, 100]), (480, [0x80, 62, 0])])
+        for tracks in [[first, second], [second, first]]:
+            found = [(t, str(pcs)) for t, pcs in windows(smf(tracks), 0.5)]
+            self.assertEqual(found, [(0.0, '0'), (0.5, '0'), (1.0, '2')])
+
+
+class FileTests(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.workdir, 'more'))
+        self.paths = []
+        for name in ['a.mid', 'b.MID', os.path.join('more', 'c.midi')]:
+            path = os.path.join(self.workdir, name)
+            with open(path, 'wb') as f:
+                f.write(CADENCE)
+            self.paths.append(path)
+        with open(os.path.join(self.workdir, 'bad.mid'), 'wb') as f:
+            f.write(b'MThd')
+        with open(os.path.join(self.workdir, 'notes.txt'), 'wb') as f:
+            f.write(b'C E G')
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def test_sources(self):
+        expected = list(simultaneities(CADENCE, masks=True))
+        with open(self.paths[0], 'rb') as f:
+            self.assertEqual(list(simultaneities(f, masks=True)), expected)
+        for source in [self.paths[0], io.BytesIO(CADENCE)]:
+            self.assertEqual(list(simultaneities(source, masks=True)),
+                             expected)
+
+    def test_copied_data(self):
+        # as on Python 2, where mapped bytes don't index as ints
+        expected = list(simultaneities(self.paths[0], masks=True))
+        original = midi.INDEXES_AS_INTS
+        midi.INDEXES_AS_INTS = False
+        try:
+            for source in [self.paths[0], CADENCE]:
+                self.assertEqual(list(simultaneities(source, masks=True)),
+                                 expected)
+        finally:
+            midi.INDEXES_AS_INTS = original
+
+    def test_mask_arrays(self):
+        times, values = mask_arrays(self.paths[0])
+        self.assertEqual(list(times), [0.0, 0.5])
+        self.assertEqual(list(values), [145, 545])
+        times, values = mask_arrays(self.paths[0], width=0.5)
+        self.assertEqual(list(values), [145, 545])
+
+    def test_midi_files(self):
+        bad = os.path.join(self.workdir, 'bad.mid')
+        self.assertEqual(midi_files(self.workdir), sorted(self.paths + [bad]))
+
+    def test_read_many(self):
+        for processes in [1, 2]:
+            found = list(read_many([self.workdir], processes=processes))
+            self.assertEqual(len(found), 4)
+            for path, times, values, error in found:
+                if path.endswith('bad.mid'):
+                    self.assertEqual(times, None)
+                    self.assertTrue('MThd' in error)
+                else:
+                    self.assertEqual(list(values), [145, 545])
+                    self.assertEqual(error, None)
+
+    def test_read_many_stopped_early(self):
+        found = read_many(self.paths * 20, processes=2, chunksize=1)
+        path, times, values, error = next(found)
+        self.assertEqual(path, self.paths[0])
+        found.close()
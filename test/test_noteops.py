@@ -34,9 +34,19 @@ in future versions.
 
 __metaclass__ = type
 
+import io
+import random
+import threading
 import unittest
-from pcsets.pcset import PcSet, DefinitionError
-from pcsets.noteops import TranslationError, pcfor, notes
+from itertools import product
+from pcsets.pcset import PcSet, DefinitionError, binarylist, binaryvalue
+from pcsets.noteops import TranslationError, pcfor, notes, notes_progression
+from pcsets.noteops import notes_many, write_notes, UFLAT, USHARP
+from pcsets.noteops import pcfor_many, note_table, value_notes
+from pcsets.noteops import UnknownKeyError, key_fifths, KEY_SPELLINGS
+from pcsets.noteops import SpellingCache, minconflict, spellings, eliminate
+from pcsets.noteops import conflict, neighborconflict, popularitycontest
+from pcsets.noteops import progression_options, respellings
 
 
 # Used in testing minimum conflict principle in notes() The only scale that
@@ -136,6 +146,96 @@ class PcForNoteTests(unittest.TestCase):
         self.assertRaises(TranslationError, pcfor, u'A\u2620 C')
 
 
+class BulkPcForTests(unittest.TestCase):
+
+    def test_table_agrees_with_pitchclass_of(self):
+        for note, pc in note_table().items():
+            self.assertEqual(list(pcfor(note)), [pc])
+
+    def test_same_as_pcfor(self):
+        text = "C E G\nDb F Ab\n\nA# B C Db\n" + u"E\u266D G\u266F"
+        found = [list(pcs) for pcs in pcfor_many(text)]
+        expected = [list(pcfor(line)) for line in text.split('\n')]
+        self.assertEqual(found, expected)
+
+    def test_file_and_delimiter(self):
+        source = io.StringIO(u"C E G|A C E|" * 10000)
+        found = list(pcfor_many(source, delimiter='|', masks=True))
+        self.assertEqual(found, [145, 529] * 10000)
+
+    def test_doubles_and_octaves(self):
+        text = u"Bbb4 Fx3 Cb-1 D\U0001D12A5"
+        self.assertEqual(list(next(pcfor_many(text, doubles=True,
+                                              octaves=True))),
+                         [9, 7, 11, 4])
+        self.assertEqual(list(pcfor_many(text)), [None])
+
+    def test_errors_by_position(self):
+        errors = []
+        text = "C E G\nC H\nAbb C\nD F A\n"
+        found = list(pcfor_many(text, errors=errors))
+        self.assertEqual(str(found[0]), '047')
+        self.assertEqual(found[1:3], [None, None])
+        self.assertEqual(str(found[3]), '259')
+        self.assertEqual(errors, [(1, 1, 'H'), (2, 0, 'Abb')])
+
+
+class KeySpellingTests(unittest.TestCase):
+
+    def test_signatures(self):
+        self.assertEqual(notes('568AB13', pref='F#'), 'E# F# G# A# B C# D#')
+        self.assertEqual(notes('68AB135', pref='Gb'),
+                         'Gb Ab Bb Cb Db Eb F')
+        self.assertEqual(notes('9B02457', pref='Am'), 'A B C D E F G')
+        self.assertEqual(notes('0257A', pref='Dm'), 'C D F G Bb')
+
+    def test_chromatic_notes(self):
+        chromatic = range(12)
+        self.assertEqual(notes(chromatic, pref='C'),
+                         'C C# D Eb E F F# G Ab A Bb B')
+        self.assertEqual(notes(chromatic, pref='D'),
+                         'C C# D D# E F F# G G# A A# B')
+        self.assertEqual(notes(chromatic, pref='Bb'),
+                         'C Db D Eb E F Gb G Ab A Bb B')
+        # raised sixth and seventh in minor keys
+        self.assertEqual(notes('6891', pref='Am'), 'F# G# A C#')
+        self.assertEqual(notes('9B12', pref='Cm'), 'A B Db D')
+        # ... but never with a double sharp
+        self.assertEqual(notes('5678', pref='G#m'), 'E# F# G G#')
+        self.assertEqual(notes('02', pref='D#m'), 'B# D')
+
+    def test_every_key_names_every_pc(self):
+        for (key, uni), names in KEY_SPELLINGS.items():
+            if not uni:
+                self.assertEqual(list(pcfor(' '.join(names))), list(range(12)))
+                self.assertEqual(len(set([name[0] for name in names])), 7)
+
+    def test_key_names(self):
+        self.assertEqual(key_fifths('Cb'), (-7, False))
+        self.assertEqual(key_fifths(u'C\u266Fm'), (4, True))
+        self.assertEqual(notes('3A', pref=u'E\u266D'), u'E\u266D B\u266D')
+        self.assertEqual(notes('3A', pref='Eb', unicode=True),
+                         u'E\u266D B\u266D')
+        for key in ['H', 'G#', 'Fbm', 'eb', 'bb', '', 'C##', 5]:
+            self.assertRaises(UnknownKeyError, key_fifths, key)
+
+    def test_other_prefs(self):
+        # anything but a sign or a key is minimum conflict, as it always was
+        for pref in ['', False, 0, 'x', 'H', 'C##', 5]:
+            self.assertEqual(notes('016', pref), 'C Db F#')
+            self.assertEqual(list(notes_many(['016'], pref)), ['C Db F#'])
+        self.assertEqual(notes('016', 'x', unicode=True),
+                         u'C D\u266D F\u266F')
+
+    def test_bulk(self):
+        sets = [PcSet(binarylist(value)) for value in range(0, 4096, 37)]
+        values = [binaryvalue(pcs) for pcs in sets]
+        for pref in [None, 'b', 'Ebm', 'A']:
+            expected = [notes(pcs, pref) for pcs in sets]
+            self.assertEqual(list(notes_many(sets, pref)), expected)
+            self.assertEqual(list(value_notes(values, pref)), expected)
+
+
 class NotesFromPcTests(unittest.TestCase):
 
     def setUp(self):
@@ -263,3 +363,191 @@ class NotesFromPcTests(unittest.TestCase):
 
     def test_empty_spec(self):
         self.assertEqual(notes(''), '')
+
+
+def exhaustive_minconflict(pcs):
+    # The original minimum conflict algorithm: score every spelling.
+    options = spellings(pcs)
+    for contest in conflict, neighborconflict, popularitycontest:
+        if len(options) > 1:
+            options = eliminate(options, based_on=contest)
+    return sorted(options)[0]
+
+
+class MinConflictEngineTests(unittest.TestCase):
+
+    def test_all_sorted_sets(self):
+        for value in range(4096):
+            pcs = binarylist(value)
+            self.assertEqual(minconflict(pcs), exhaustive_minconflict(pcs))
+
+    def test_shuffled_sets(self):
+        rng = random.Random(1)
+        for value in range(0, 4096, 3):
+            pcs = binarylist(value)
+            rng.shuffle(pcs)
+            self.assertEqual(minconflict(pcs), exhaustive_minconflict(pcs))
+
+    def test_repeated_pitch_classes(self):
+        rng = random.Random(2)
+        for trial in range(500):
+            pcs = [rng.randrange(12) for n in range(rng.randrange(1, 14))]
+            self.assertEqual(minconflict(pcs), exhaustive_minconflict(pcs))
+
+    def test_long_melody(self):
+        melody = [0, 2, 4, 5, 7, 9, 11, 10, 8, 6, 3, 1] * 200
+        spelled = minconflict(melody).split()
+        self.assertEqual(len(spelled), len(melody))
+        self.assertEqual(list(pcfor(' '.join(spelled))), melody[:12])
+
+
+class BulkNotesTests(unittest.TestCase):
+
+    def setUp(self):
+        majorscale = PcSet('024579B')
+        self.sets = [majorscale.T(n) for n in range(12)] * 3
+        self.sets += [range(12), '0134', [], PcSet('AB01')]
+
+    def test_same_as_notes(self):
+        for pref in (None, 'b', '#', UFLAT, USHARP):
+            for u in (False, True):
+                self.assertEqual(list(notes_many(self.sets, pref, u)),
+                                 [notes(pcs, pref, u) for pcs in self.sets])
+
+    def test_lazy(self):
+        def endless():
+            while True:
+                yield PcSet('037')
+        stream = notes_many(endless(), pref='#')
+        self.assertEqual(next(stream), 'C D# G')
+
+    def test_bad_input(self):
+        stream = notes_many(['037', '01E'])
+        self.assertEqual(next(stream), 'C Eb G')
+        self.assertRaises(DefinitionError, next, stream)
+
+    def test_write_notes(self):
+        class Sink:
+            def __init__(self):
+                self.parts = []
+
+            def write(self, s):
+                self.parts.append(s)
+        sink = Sink()
+        count = write_notes((PcSet('037').T(n) for n in range(2000)), sink)
+        self.assertEqual(count, 2000)
+        self.assertEqual(len(sink.parts), 2)
+        lines = ''.join(sink.parts).split('\n')
+        self.assertEqual(len(lines), 2001)
+        self.assertEqual(lines[0], 'C Eb G')
+        self.assertEqual(lines[-1], '')
+
+
+class ProgressionTests(unittest.TestCase):
+
+    def test_single_chord_as_notes(self):
+        for value in range(0, 4096, 5):
+            pcs = binarylist(value)
+            self.assertEqual(notes_progression([pcs]), [notes(pcs)])
+
+    def test_against_brute_force(self):
+        rng = random.Random(3)
+        for trial in range(100):
+            progression = [rng.sample(range(12), rng.randrange(1, 6))
+                           for n in range(rng.randrange(1, 5))]
+            options = [progression_options(pcs) for pcs in progression]
+            present = [binaryvalue(pcs) for pcs in progression]
+            best = None
+            for choice in product(*options):
+                score = [0, 0, 0, 0]
+                for i, (string, grade, sharps) in enumerate(choice):
+                    score[0] -= grade[0]
+                    score[2] -= grade[1]
+                    score[3] -= grade[2]
+                    if i:
+                        shared = present[i] & present[i - 1]
+                        score[1] += respellings(sharps & shared,
+                                                choice[i - 1][2] & shared)
+                key = (score, [c[0] for c in choice])
+                if best is None or key < best:
+                    best = key
+            self.assertEqual(notes_progression(progression), best[1])
+
+    def test_consistent_spelling(self):
+        # On its own, '012' prefers the more popular C#.
+        self.assertEqual(notes('012'), 'C C# D')
+        self.assertEqual(notes_progression(['012', '013']),
+                         ['C Db D', 'C Db Eb'])
+
+    def test_scale_progression(self):
+        # Each major scale on its own is already consistent with itself.
+        majorscale = PcSet('024579B')
+        progression = [majorscale.T(n) for n in (0, 7, 2, 9)]
+        self.assertEqual(notes_progression(progression),
+                         [notes(pcs) for pcs in progression])
+
+    def test_long_progression(self):
+        progression = [PcSet('047').T(n) for n in range(12)] * 100
+        spelled = notes_progression(progression)
+        self.assertEqual(len(spelled), 1200)
+        self.assertEqual(spelled[:12], spelled[12:24])
+
+    def test_unicode(self):
+        self.assertEqual(notes_progression(['013'], unicode=True),
+                         [u'C D\u266d E\u266d'])
+
+    def test_empty(self):
+        self.assertEqual(notes_progression([]), [])
+        self.assertEqual(notes_progression([[]]), [''])
+
+
+class SpellingCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = SpellingCache(maxsize=4)
+
+    def test_same_answers(self):
+        for spec in ('AB01', 'AB9', '9AB', '0134', '024579B'):
+            pcs = PcSet(spec)
+            self.assertEqual(self.cache.spell(pcs), minconflict(pcs))
+            self.assertEqual(self.cache.spell(pcs), minconflict(pcs))
+
+    def test_statistics(self):
+        self.cache.spell(PcSet('AB01'))
+        self.cache.spell(PcSet('AB01'))
+        self.cache.spell(PcSet('10BA'))  # order matters
+        info = self.cache.info()
+        self.assertEqual((info['hits'], info['misses'], info['size']),
+                         (1, 2, 2))
+
+    def test_bounded(self):
+        for n in range(12):
+            self.cache.spell([n, (n + 1) % 12])
+        self.assertEqual(self.cache.info()['size'], 4)
+        # the most recent entries survive
+        self.cache.spell([11, 0])
+        self.assertEqual(self.cache.info()['hits'], 1)
+
+    def test_precomputed_table(self):
+        self.cache.precompute()
+        self.assertEqual(self.cache.info()['table'], 4096)
+        for value in range(0, 4096, 7):
+            pcs = binarylist(value)
+            self.assertEqual(self.cache.spell(pcs), minconflict(pcs))
+        self.assertEqual(self.cache.info()['misses'], 0)
+
+    def test_threads(self):
+        results = []
+        majorscale = PcSet('024579B')
+
+        def work():
+            results.append([self.cache.spell(majorscale.T(n))
+                            for n in range(12)])
+        threads = [threading.Thread(target=work) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        expected = [minconflict(majorscale.T(n)) for n in range(12)]
+        self.assertEqual(results, [expected] * 8)
+        self.assertTrue(self.cache.info()['size'] <= 4)
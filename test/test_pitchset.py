@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+
+# pcsets 2.0.2 -- Pitch Class Sets for Python.
+#
+# Copyright 2007 Bruce H. McCosar
+#
+# This file is part of the package 'pcsets'
+#
+# The package 'pcsets' is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3 of
+# the License, or (at your option) any later version.
+#
+# The package 'pcsets' is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Test suite for pitchset.py -- EXPERIMENTAL
+"""
+
+__metaclass__ = type
+
+import random
+import unittest
+from array import array
+from pcsets.pcset import PcSet, binaryvalue
+from pcsets.noteops import TranslationError
+from pcsets.pitchset import PitchSet, PitchNameError, pitchfor, values_of
+
+
+class DefinitionTests(unittest.TestCase):
+
+    def test_pitch_names(self):
+        self.assertEqual(list(pitchfor('C4 Eb4 G4')), [60, 63, 67])
+        self.assertEqual(list(pitchfor('A0 C8 C-1 G9')), [21, 108, 0, 127])
+        self.assertEqual(list(pitchfor(u'B#3 Cb4 F\u266F2 Ebb-1 Fx2')),
+                         [60, 59, 42, 2, 43])
+        self.assertEqual(list(pitchfor('60 63 67')), [60, 63, 67])
+
+    def test_order_and_duplicates(self):
+        self.assertEqual(list(PitchSet([67, 60, 64, 60, 67])), [67, 60, 64])
+        self.assertEqual(str(PitchSet('C4 E4 C5')), '60 64 72')
+
+    def test_bad_names(self):
+        for bad in ['C', 'C#', 'Cb-', 'H4', 'C$4']:
+            self.assertRaises(TranslationError, pitchfor, bad)
+        self.assertRaises(PitchNameError, pitchfor, 'E')
+        self.assertRaises(TranslationError, pitchfor, 60)
+
+
+class ProjectionTests(unittest.TestCase):
+
+    def test_pcs(self):
+        wide = PitchSet([48, 67, 76, 60])
+        self.assertEqual(str(wide.pcs()), '074')
+        self.assertEqual(wide.value(), binaryvalue([0, 4, 7]))
+        self.assertTrue(wide.pcs() is wide.pcs())
+
+    def test_outside_midi_range(self):
+        pitches = PitchSet([-1, 130, -24])
+        self.assertEqual(str(pitches.pcs()), 'BA0')
+        self.assertEqual(pitches.value(), binaryvalue([11, 10, 0]))
+
+    def test_values_of(self):
+        generator = random.Random(7)
+        sets = [[generator.randint(-30, 160) for n in range(6)]
+                for i in range(500)]
+        sets += [[], array('i', [60, 64, 67]), PitchSet('C4 F4 A4')]
+        expected = [binaryvalue(PcSet([p % 12 for p in pitches]))
+                    for pitches in sets]
+        self.assertEqual(list(values_of(sets)), expected)
+
+
+class RegisterTests(unittest.TestCase):
+
+    def setUp(self):
+        self.chord = pitchfor('E4 C3 G3 Bb4')
+
+    def test_statistics(self):
+        self.assertEqual(self.chord.lowest(), 48)
+        self.assertEqual(self.chord.highest(), 70)
+        self.assertEqual(self.chord.span(), 22)
+        self.assertEqual(self.chord.mean(), 59.25)
+        self.assertEqual(self.chord.spacing(), [7, 9, 6])
+
+    def test_empty(self):
+        empty = PitchSet([])
+        self.assertEqual((empty.lowest(), empty.highest(), empty.mean()),
+                         (None, None, None))
+        self.assertEqual((empty.span(), empty.spacing(), empty.value()),
+                         (0, [], 0))
+
+    def test_operations(self):
+        self.assertEqual(list(self.chord.transpose(-12)), [52, 36, 43, 58])
+        self.assertEqual(list(self.chord.sort()), [48, 55, 64, 70])
+
+    def test_names(self):
+        self.assertEqual(self.chord.names(), 'E4 C3 G3 Bb4')
+        self.assertEqual(self.chord.names('#'), 'E4 C3 G3 A#4')
+        self.assertEqual(PitchSet([60, 65, 71]).names('Gb'), 'C4 F4 Cb5')
+        self.assertEqual(PitchSet([60, 66]).names('C#'), 'B#3 F#4')
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+
+# pcsets 2.0.2 -- Pitch Class Sets for Python.
+#
+# Copyright 2007 Bruce H. McCosar
+#
+# This file is part of the package 'pcsets'
+#
+# The package 'pcsets' is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3 of
+# the License, or (at your option) any later version.
+#
+# The package 'pcsets' is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Test suite for rowsearch.py -- EXPERIMENTAL
+"""
+
+__metaclass__ = type
+
+import unittest
+from pcsets.pcset import PcSet
+from pcsets.tonerow import ToneRow, rowkey, unique_rows
+from pcsets.rowsearch import interval_rows, segment_rows, segment_values
+
+
+class IntervalRowTests(unittest.TestCase):
+
+    def test_all_interval_series(self):
+        series = list(interval_rows(distinct=True))
+        self.assertEqual(len(series), 3856)
+        self.assertEqual(len(set([str(row) for row in series])), 3856)
+        for row in series:
+            self.assertEqual(str(row)[0], '0')
+            self.assertEqual(sorted(row.contour()[:11]), list(range(1, 12)))
+        # smallest intervals first
+        self.assertEqual(str(series[0]), '013725BA8496')
+
+    def test_unique_series(self):
+        classes = list(interval_rows(distinct=True, unique=True))
+        keys = set([rowkey(row) for row in classes])
+        self.assertEqual(len(keys), len(classes))
+        self.assertTrue(rowkey(ToneRow('0B1A29384756')) in keys)
+
+    def test_one_interval(self):
+        rows = [str(row) for row in interval_rows('A', intervals=[1, 11])]
+        self.assertEqual(rows, ['AB0123456789', 'A9876543210B'])
+        rows = [str(row) for row in interval_rows(intervals=[7])]
+        self.assertEqual(rows, ['07294B6183A5'])
+
+    def test_per_position(self):
+        allowed = [[1, 2, 3]] * 5 + [None] * 6
+        rows = list(interval_rows(3, intervals=allowed))
+        self.assertTrue(rows)
+        for row in rows:
+            contour = row.contour()
+            for position in range(5):
+                self.assertTrue(contour[position] in (1, 2, 3))
+        self.assertEqual(len(rows), len(set([str(row) for row in rows])))
+
+    def test_any_first(self):
+        rows = list(interval_rows(None, intervals=[5]))
+        self.assertEqual([str(row)[0] for row in rows],
+                         list('0123456789AB'))
+        self.assertEqual(len(list(interval_rows(None, intervals=[5],
+                                                unique=True))), 1)
+
+    def test_any_first_unique(self):
+        # searching from 0 alone finds the same families, in the same order
+        rows = [row for first in range(12)
+                for row in interval_rows(first, intervals=[1, 5, 7, 11])]
+        expected = [str(row) for row in unique_rows(rows)]
+        found = interval_rows(None, intervals=[1, 5, 7, 11], unique=True)
+        self.assertEqual([str(row) for row in found], expected)
+
+    def test_streaming(self):
+        found = interval_rows(distinct=True)
+        self.assertEqual(str(next(found)), '013725BA8496')
+
+    def test_no_rows(self):
+        self.assertEqual(list(interval_rows(intervals=[2, 4])), [])
+        self.assertEqual(list(interval_rows(intervals=[0])), [])
+        self.assertRaises(ValueError, interval_rows, intervals=[[1]])
+
+
+class SegmentRowTests(unittest.TestCase):
+
+    def test_segment_values(self):
+        found = list(segment_values(['014'] * 4))
+        self.assertEqual(len(found), 432)
+        for values in found:
+            self.assertEqual(sum(values), 0xFFF)
+            for value in values:
+                self.assertEqual(bin(value).count('1'), 3)
+        self.assertEqual(len(list(segment_values(['014'] * 4, 0))), 108)
+        self.assertEqual(len(list(segment_values([3] * 4))), 369600)
+
+    def test_impossible_classes(self):
+        self.assertEqual(list(segment_values(['0157'] * 3)), [])
+        self.assertEqual(list(segment_rows(['0248'] * 3)), [])
+
+    def test_derived_rows(self):
+        rows = list(segment_rows(['014'] * 4))
+        self.assertEqual(len(rows), 108 * 6 ** 3 * 2)
+        self.assertEqual(len(set([str(row) for row in rows])), len(rows))
+        for row in rows[::97]:
+            self.assertEqual(str(row)[0], '0')
+            spec = str(row)
+            for start in range(0, 12, 3):
+                segment = PcSet(spec[start:start + 3])
+                self.assertEqual(str(segment.prime()), '014')
+
+    def test_free_segments(self):
+        found = list(segment_values(['012345', 6]))
+        self.assertEqual(len(found), 12)
+        self.assertEqual(len(list(segment_values([6, '012345']))), 12)
+        hexachords = [values[0] for values in
+                      segment_values(['0123456', 5])]
+        self.assertEqual(len(hexachords), 12)
+
+    def test_unique(self):
+        rows = list(segment_rows(['014'] * 4, unique=True))
+        keys = set([rowkey(row) for row in rows])
+        self.assertEqual(len(keys), len(rows))
+        self.assertTrue(rowkey(ToneRow('0145892367AB')) in keys)
+
+    def test_bad_segments(self):
+        self.assertRaises(ValueError, segment_rows, ['014'] * 3)
+        self.assertRaises(ValueError, segment_rows, ['0123456', 6])
+        self.assertRaises(ValueError, segment_values, [0, 12])
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+
+# pcsets 2.0.2 -- Pitch Class Sets for Python.
+#
+# Copyright 2007 Bruce H. McCosar
+#
+# This file is part of the package 'pcsets'
+#
+# The package 'pcsets' is free software; you can redistribute it
+# and/or modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 3 of
+# the License, or (at your option) any later version.
+#
+# The package 'pcsets' is distributed in the hope that it will be
+# useful, but WITHOUT ANY WARRANTY; without even the implied warranty
+# of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+
+"""
+Test suite for segments.py -- EXPERIMENTAL
+"""
+
+__metaclass__ = type
+
+import unittest
+from random import Random
+from pcsets.pcset import PcSet, binaryvalue
+from pcsets.pcops import same_prime
+from pcsets.tonerow import ToneRow
+from pcsets.segments import class_tables, window_values
+from pcsets.segments import sliding_arrays, sliding_classes
+
+WEBERN = 'BA2376845019'
+
+
+def sliced(pcs, start, width):
+    """
+    Utility function. The window the slow way: a new PcSet of the notes.
+    """
+    notes = (pcs + pcs)[start:start + width]
+    return PcSet(notes)
+
+
+class WindowTests(unittest.TestCase):
+
+    def test_matches_slices(self):
+        random = Random(24)
+        melody = [random.randrange(40, 90) for i in range(200)]
+        for width, count in [(1, 200), (3, 198), (7, 194), (200, 1)]:
+            found = list(window_values(melody, width))
+            self.assertEqual(len(found), count)
+            for start, w, value in found:
+                self.assertEqual(w, width)
+                self.assertEqual(value,
+                                 binaryvalue(sliced(melody, start, width)))
+
+    def test_repeated_notes(self):
+        found = list(window_values([0, 0, 4, 0, 7, 7, 7], 3))
+        self.assertEqual([value for start, width, value in found],
+                         [17, 17, 145, 129, 128])
+
+    def test_cyclic(self):
+        row = [int(pc, 16) for pc in WEBERN]
+        found = list(window_values(row, [4, 2], cyclic=True))
+        self.assertEqual(len(found), 24)
+        for start, width, value in found:
+            self.assertEqual(value, binaryvalue(sliced(row, start, width)))
+        self.assertEqual(found[-1], (11, 4, binaryvalue([9, 11, 10, 2])))
+
+    def test_order(self):
+        found = [(start, width) for start, width, value
+                 in window_values('0123', [2, 1, 3])]
+        self.assertEqual(found, [(0, 1), (0, 2), (1, 1), (1, 2), (2, 1),
+                                 (0, 3), (2, 2), (3, 1), (1, 3)])
+
+    def test_too_wide(self):
+        self.assertEqual(list(window_values('014', 4)), [])
+        self.assertRaises(ValueError, list, window_values('014', 4, True))
+        self.assertRaises(ValueError, list, window_values('014', 0))
+        self.assertRaises(ValueError, list, window_values('014', []))
+
+
+class SlidingClassTests(unittest.TestCase):
+
+    def test_webern(self):
+        names = [name for start, width, index, name, ivec
+                 in sliding_classes(ToneRow(WEBERN), 3)]
+        self.assertEqual(names[::3], ['014'] * 4)
+
+    def test_classes_match_primes(self):
+        table, names, ivecs = class_tables()
+        random = Random(12)
+        melody = [random.randrange(12) for i in range(100)]
+        for start, width, index, name, ivec in \
+                sliding_classes(melody, [2, 5, 9]):
+            pcs = sliced(melody, start, width)
+            self.assertTrue(same_prime(PcSet(name), pcs))
+            self.assertEqual(ivec, tuple(pcs.ivec()))
+            self.assertEqual(names[index], name)
+
+    def test_arrays(self):
+        found = sliding_arrays(WEBERN, [3, 6], cyclic=True)
+        self.assertEqual(sorted(found), [3, 6])
+        table = class_tables()[0]
+        for width in (3, 6):
+            values, classes = found[width]
+            self.assertEqual(len(values), 12)
+            self.assertEqual(list(classes), [table[v] for v in values])
+            expected = [value for start, w, value
+                        in window_values(WEBERN, width, True)]
+            self.assertEqual(list(values), expected)
+        # the two halves of a row are complements, so share an ivec
+        ivecs = class_tables()[2]
+        classes = found[6][1]
+        for start in range(6):
+            self.assertEqual(ivecs[classes[start]],
+                             ivecs[classes[start + 6]])
@@ -33,10 +33,13 @@ won't be stable until at least version 2.1
 __metaclass__ = type
 
 import unittest
+from array import array
+from random import Random
 
 from pcsets.pcset import PcSet
 from pcsets.noteops import pcfor
 from pcsets.tonerow import *  # noqa
+from pcsets.tonerow import correct_transposition, TRANSFORMS
 
 
 class ToneRowDefinition(unittest.TestCase):
@@ -198,3 +201,293 @@ class ToneRowOperations(unittest.TestCase):
         # order is everything
         b = ToneRow(list(range(10)) + [11, 10])
         self.failIf(rotequiv(a, b))
+
+
+class PackedRowTests(unittest.TestCase):
+
+    def test_forms_match_pcset_operations(self):
+        for trial in range(20):
+            row = randomrow()
+            pcs = PcSet(row)
+            for n in range(12):
+                for form, source in [(row.P(n), pcs),
+                                     (row.R(n), pcs.reverse()),
+                                     (row.I(n), pcs.invert()),
+                                     (row.RI(n), pcs.invert().reverse())]:
+                    expected = correct_transposition(source, n)
+                    self.assertEqual(list(form), list(expected))
+                    self.assertTrue(isinstance(form, ToneRow))
+                    self.assertEqual(form.encoded,
+                                     ToneRow(expected).encoded)
+
+    def test_shift_any_amount(self):
+        row = randomrow()
+        for i in range(-25, 26):
+            self.assertEqual(list(row.shift(i)), list(PcSet(row).shift(i)))
+
+    def test_packed(self):
+        self.assertEqual(ToneRow('0123456789AB').packed(), 0xBA9876543210)
+        self.assertEqual(ToneRow('B0123456789A').packed(), 0xA9876543210B)
+        row = randomrow()
+        self.assertEqual(str(unpacked(row.packed())), str(row))
+        self.assertEqual(str(unpacked(row.packed()).RI(3)), str(row.RI(3)))
+
+
+class FormsAndMatrixTests(unittest.TestCase):
+
+    def setUp(self):
+        self.row = ToneRow([8, 0, 5, 9, 1, 7, 10, 6, 2, 3, 11, 4])
+
+    def test_forms(self):
+        forms = self.row.forms()
+        self.assertEqual(len(forms), 48)
+        methods = {'P': self.row.P, 'R': self.row.R, 'I': self.row.I,
+                   'RI': self.row.RI}
+        for label, form in forms:
+            transform, n = label.rstrip('0123456789'), label.lstrip('PRI')
+            self.assertEqual(str(form), str(methods[transform](int(n))))
+        self.assertEqual([label for label, form in forms[:13]],
+                         ['P%d' % n for n in range(12)] + ['R0'])
+        self.assertTrue(self.row.forms() is forms)
+
+    def test_matrix(self):
+        matrix = self.row.matrix()
+        self.assertEqual(list(matrix[0]), list(self.row))
+        self.assertEqual([line[0] for line in matrix], list(self.row.I(8)))
+        for line in matrix:
+            self.assertEqual(list(line), list(self.row.P(line[0])))
+        for j in range(12):
+            column = [line[j] for line in matrix]
+            self.assertEqual(column, list(self.row.I(column[0])))
+        self.assertTrue(self.row.matrix() is matrix)
+
+    def test_forms_of_forms(self):
+        form = self.row.RI(2)
+        self.assertEqual(str(form), '273408B5916A')
+        self.assertEqual(str(form.matrix()[0]), str(tuple(form)))
+        self.assertEqual(str(form.forms()[0][1]), str(self.row.RI(0)))
+
+
+class RowKeyTests(unittest.TestCase):
+
+    def setUp(self):
+        self.row = ToneRow([8, 0, 5, 9, 1, 7, 10, 6, 2, 3, 11, 4])
+
+    def test_same_key_for_every_form(self):
+        key = rowkey(self.row)
+        for label, form in self.row.forms():
+            self.assertEqual(rowkey(form), key)
+        self.assertEqual(rowkey(list(self.row.R(3))), key)
+        self.assertNotEqual(rowkey(self.row.shift(1)), key)
+
+    def test_key_is_least_form(self):
+        least = min([list(f(0)) for f in [self.row.P, self.row.R,
+                                          self.row.I, self.row.RI]])
+        self.assertEqual(list(bytearray(rowkey(self.row))), least)
+        self.assertEqual(list(bytearray(rowkey(ToneRow(range(12))))),
+                         list(range(12)))
+
+    def test_rotation_keys(self):
+        key = rowkey(self.row, rotation=True)
+        for i in range(12):
+            for label, form in self.row.shift(i).forms():
+                self.assertEqual(rowkey(form, True), key)
+        other = ToneRow(list(range(10)) + [11, 10])
+        self.assertNotEqual(rowkey(other, True), rowkey(ToneRow(range(12)),
+                                                        True))
+
+    def test_unique_rows(self):
+        rows = [form for label, form in self.row.forms()]
+        rows += [self.row.shift(i) for i in range(12)]
+        self.assertEqual(len(list(unique_rows(rows))), 12)
+        found = list(unique_rows(rows, rotation=True))
+        self.assertEqual([str(row) for row in found], [str(self.row.P(0))])
+
+
+class LabelTests(unittest.TestCase):
+
+    def setUp(self):
+        self.row = ToneRow([8, 0, 5, 9, 1, 7, 10, 6, 2, 3, 11, 4])
+
+    def test_label(self):
+        self.assertEqual(self.row.label(self.row.RI(7)), 'RI7')
+        self.assertEqual(self.row.label(list(self.row.I(10))), 'I10')
+        self.assertEqual(self.row.label(self.row.P(3).encoded), 'P3')
+        self.assertEqual(self.row.label(self.row.shift(1)), None)
+        self.assertEqual(self.row.label([1, 2, 3]), None)
+        self.assertEqual(self.row.label([300] * 12), None)
+
+    def test_symmetric_row(self):
+        chromatic = ToneRow(range(12))
+        self.assertEqual(chromatic.label(chromatic.RI(5)), 'P5')
+
+    def test_label_rows(self):
+        labels = [label for label, form in self.row.forms()]
+        rows = [form for label, form in self.row.forms()] + [randomrow()]
+        found = label_rows(self.row, rows)
+        self.assertEqual(found[:48], labels)
+        self.assertTrue(found[48] in labels + [None])
+        packed = array('B')
+        for row in rows:
+            packed.extend(row)
+        self.assertEqual(label_rows(self.row, packed), found)
+        self.assertEqual(label_rows(self.row, bytes(bytearray(packed))), found)
+
+
+class CombinatorialityTests(unittest.TestCase):
+
+    def partners(self, row):
+        # the slow way: every form whose first hexachord is disjoint
+        first = set(list(row)[:6])
+        return tuple([label for label, form in row.forms()
+                      if not first & set(list(form)[:6])])
+
+    def test_partners_match_forms(self):
+        rows = [randomrow() for n in range(50)]
+        rows += [ToneRow(range(12)), ToneRow('0145892367AB')]
+        for row in rows:
+            self.assertEqual(row.combinatorial(), self.partners(row))
+            transforms = set([label.rstrip('0123456789')
+                              for label in row.combinatorial()])
+            self.assertEqual(set(row.combinatoriality()), transforms)
+
+    def test_chromatic(self):
+        row = ToneRow(range(12))
+        self.assertEqual(row.combinatorial(), ('P6', 'R11', 'I11', 'RI6'))
+        self.assertEqual(row.combinatoriality(), ('P', 'R', 'I', 'RI'))
+
+    def test_semicombinatorial(self):
+        # Schoenberg, Op. 33a: I-combinatorial only (besides R)
+        row = ToneRow('A50B96137824')
+        self.assertEqual(row.combinatoriality(), ('R', 'I'))
+        self.assertEqual(row.combinatorial(), ('R4', 'I3'))
+
+    def test_all_combinatorial_table(self):
+        self.assertEqual(ALL_COMBINATORIAL, ('012345', '012678', '014589',
+                                             '023457', '024579', '02468A'))
+
+    def test_combinatorial_rows(self):
+        rows = [randomrow() for n in range(100)] + [ToneRow(range(12))]
+        expected = [sum([1 << TRANSFORMS.index(transform)
+                         for transform in row.combinatoriality()])
+                    for row in rows]
+        self.assertEqual(list(combinatorial_rows(rows)), expected)
+        packed = array('B')
+        for row in rows:
+            packed.extend(row)
+        self.assertEqual(list(combinatorial_rows(packed)), expected)
+        self.assertEqual(list(combinatorial_rows(bytes(bytearray(packed)))),
+                         expected)
+        self.assertEqual(combinatorial_rows(packed)[-1], 15)
+
+
+class RandomRowTests(unittest.TestCase):
+
+    def test_rank_order(self):
+        self.assertEqual(ToneRow('0123456789AB').rank(), 0)
+        self.assertEqual(ToneRow('0123456789BA').rank(), 1)
+        self.assertEqual(ToneRow('BA9876543210').rank(), 479001599)
+        self.assertEqual(str(unranked(2)), '012345678A9B')
+        self.assertRaises(ValueError, unranked, 479001600)
+        self.assertRaises(ValueError, unranked, -1)
+
+    def test_rank_round_trip(self):
+        for n in range(100):
+            row = randomrow()
+            self.assertEqual(list(unranked(row.rank())), list(row))
+
+    def test_random_rows(self):
+        rows = random_rows(500, seed=7)
+        self.assertEqual(len(rows), 6000)
+        for start in range(0, 6000, 12):
+            self.assertEqual(sorted(rows[start:start + 12]), list(range(12)))
+        self.assertEqual(random_rows(500, seed=7), rows)
+        self.assertNotEqual(random_rows(500, seed=8), rows)
+
+    def test_generator_stream(self):
+        rng = Random(3)
+        first = random_rows(10, rng)
+        self.assertNotEqual(random_rows(10, rng), first)
+        both = random_rows(20, Random(3))
+        self.assertEqual(both[:120], first)
+
+    def test_random_classes(self):
+        rows = random_rows(300, seed=1, classes=True)
+        for start in range(0, len(rows), 12):
+            key = bytes(bytearray(rows[start:start + 12]))
+            self.assertEqual(rowkey(ToneRow(list(rows[start:start + 12]))),
+                             key)
+
+
+class InvarianceTests(unittest.TestCase):
+
+    def partners(self, row, positions, contiguous):
+        # the slow way: compare the notes of every form, place by place
+        own = 'P%d' % list(row)[0]
+        notes = set([list(row)[i] for i in positions])
+        size = len(positions)
+        if contiguous:
+            places = [tuple(range(start, start + size))
+                      for start in range(13 - size)]
+        else:
+            places = [positions]
+        return tuple([(label, place) for label, form in row.forms()
+                      if label != own for place in places
+                      if set([list(form)[i] for i in place]) == notes])
+
+    def test_runs_match_forms(self):
+        for row in [ToneRow('BA2376845019'), randomrow(), randomrow()]:
+            found = dict(row.invariants())
+            for size in range(2, 7):
+                for start in range(13 - size):
+                    positions = tuple(range(start, start + size))
+                    expected = self.partners(row, positions, True)
+                    self.assertEqual(found.get(positions, ()), expected)
+
+    def test_scattered_match_forms(self):
+        row = ToneRow('A50B96137824')
+        found = row.invariants([2, 3], contiguous=False)
+        expected = []
+        for a in range(12):
+            for b in range(a + 1, 12):
+                for positions in [(a, b)] + [(a, b, c)
+                                             for c in range(b + 1, 12)]:
+                    partners = self.partners(row, positions, False)
+                    if partners:
+                        expected.append((positions, partners))
+        expected.sort(key=lambda item: (len(item[0]), item[0]))
+        self.assertEqual(found, expected)
+
+    def test_retrograde_always_partner(self):
+        row = randomrow()
+        retrograde = 'R%d' % list(row)[11]
+        for positions, partners in row.invariants([4]):
+            mirror = tuple([11 - i for i in reversed(positions)])
+            self.assertTrue((retrograde, mirror) in partners)
+
+    def test_webern(self):
+        # a derived row: each trichord comes back in other forms
+        row = ToneRow('BA2376845019')
+        trichords = dict(row.invariants([3]))
+        for start in (0, 3, 6, 9):
+            self.assertTrue(tuple(range(start, start + 3)) in trichords)
+        self.assertEqual(trichords[(0, 1, 2)][:3],
+                         (('P5', (6, 7, 8)), ('R3', (3, 4, 5)),
+                          ('R9', (9, 10, 11))))
+
+    def test_invariant_rows(self):
+        rows = random_rows(20, seed=3)
+        expected = [ToneRow(list(rows[i:i + 12])).invariants([3, 5], False)
+                    for i in range(0, len(rows), 12)]
+        self.assertEqual(invariant_rows(rows, [3, 5], False), expected)
+        self.assertEqual(invariant_rows(bytes(bytearray(rows)), [3, 5],
+                                        False), expected)
+        row = ToneRow(list(rows[:12]))
+        self.assertEqual(invariant_rows([row]), [row.invariants()])
+
+    def test_sizes(self):
+        row = randomrow()
+        self.assertRaises(ValueError, row.invariants, [0])
+        self.assertRaises(ValueError, invariant_rows, [row], [13])
+        # any single note is a run of every form
+        self.assertEqual(len(row.invariants([1])), 12)